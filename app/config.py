@@ -12,31 +12,174 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 # Max size for resume uploads (bytes)
 MAX_PDF_SIZE = 3 * 1024 * 1024  # 3MB limit
+MAX_JD_PDF_SIZE = int(os.getenv("MAX_JD_PDF_SIZE", str(5 * 1024 * 1024)))
+
+# PDF text extraction (process pool; 0 workers = extract in-thread)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))  # shard pages across workers from here
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "200000"))
+
+# Content-addressed resume PDF store (see app/utils/blob_store.py)
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "blobs")
+
+# LLM gateway (shared, connection-pooled OpenAI client)
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o")
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4o-mini")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))  # seconds per request
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))  # seconds
+
+# Persistent response cache for deterministic calls that opt in (cache=True)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# API-key auth cache (per process; TTL bounds staleness across workers)
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))  # seconds
+
+# Prompt input budget (tokens) per LLM call; oversized sections are trimmed
+# lowest-priority first (see app/services/prompt_builder.py)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+PROMPT_SECTION_MIN_TOKENS = int(os.getenv("PROMPT_SECTION_MIN_TOKENS", "200"))
+
+# Prompts use the compact JD digest ("digest") or the full text ("raw")
+JD_PROMPT_MODE = os.getenv("JD_PROMPT_MODE", "digest")
+
+# Admin bulk resume ingestion
+BULK_INGEST_MAX_BYTES = int(os.getenv("BULK_INGEST_MAX_BYTES", str(200 * 1024 * 1024)))
+BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", "500"))
+BULK_PDF_CONCURRENCY = int(os.getenv("BULK_PDF_CONCURRENCY", "2"))  # concurrent PDF extractions
+BULK_LLM_CONCURRENCY = int(os.getenv("BULK_LLM_CONCURRENCY", "4"))  # concurrent resume analyses
+BULK_INSERT_BATCH = int(os.getenv("BULK_INSERT_BATCH", "25"))  # interviews per write transaction
+BULK_JOB_WORKERS = int(os.getenv("BULK_JOB_WORKERS", "1"))  # bulk jobs run on their own pool, not JOB_WORKERS
+
+# Background jobs (in-process worker pool, status in the jobs table)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+PREGEN_WAIT_TIMEOUT = float(os.getenv("PREGEN_WAIT_TIMEOUT", "90"))  # seconds
+JOB_STALE_AFTER = int(os.getenv("JOB_STALE_AFTER", "900"))  # seconds without progress before a job counts as dead
+
+# Question inventory: top up unasked consequential stock only when it
+# drops below the low-water mark, in batches of at most QUESTION_BATCH_SIZE
+QUESTION_LOW_WATER_MARK = int(os.getenv("QUESTION_LOW_WATER_MARK", "2"))
+QUESTION_BATCH_SIZE = int(os.getenv("QUESTION_BATCH_SIZE", "8"))
+
+# How submit_answer talks to the LLM per turn:
+#   "two_call"    - evaluate, then generate the follow-up (default)
+#   "single_shot" - one structured call returns evaluation + next follow-up
+#   "speculative" - draft the follow-up concurrently with evaluation and
+#                   keep it only if the turn actually needs a follow-up
+TURN_MODE = os.getenv("TURN_MODE", "two_call")
 
 if not OPENAI_API_KEY:
     raise ValueError("Missing OPENAI_API_KEY in .env")
 
 
+import threading
+import time
+
 from app.database import get_db
 
-def get_question_limits():
-    """
-    Returns:
-      total_questions, consequential_max, followup_max
-    """
+# Config snapshot cache: question_config, pass_threshold and the JD change
+# only through /admin/set_*, which bump config_version. Other workers notice
+# the bump on their next version probe (at most every N seconds).
+CONFIG_VERSION_CHECK_INTERVAL = float(os.getenv("CONFIG_VERSION_CHECK_INTERVAL", "2"))
+
+DEFAULT_QUESTION_LIMITS = (5, 3, 2)
+DEFAULT_PASS_THRESHOLD = 0.85
+
+_config_snapshot = None
+_config_lock = threading.Lock()
+
+
+def _read_config_version(db) -> int:
+    row = db.execute("SELECT version FROM config_version WHERE id = 1").fetchone()
+    return row["version"] if row else 0
+
+
+def _load_config_snapshot() -> dict:
     with get_db() as db:
-        row = db.execute("""
+        # One read transaction so version and values are consistent
+        db.execute("BEGIN")
+        version = _read_config_version(db)
+        limits = db.execute("""
             SELECT total_questions, consequential_max, followup_max
             FROM question_config
             LIMIT 1
         """).fetchone()
+        threshold = db.execute("SELECT value FROM pass_threshold LIMIT 1").fetchone()
+        jd = db.execute("""
+            SELECT content, digest, raw_tokens, digest_tokens
+            FROM job_description
+        """).fetchone()
+
+    return {
+        "version": version,
+        "question_limits": (
+            (limits["total_questions"], limits["consequential_max"], limits["followup_max"])
+            if limits else DEFAULT_QUESTION_LIMITS  # Default fallback if DB empty
+        ),
+        "pass_threshold": float(threshold["value"]) if threshold else DEFAULT_PASS_THRESHOLD,
+        "job_description": jd["content"] if jd else "",
+        "jd_digest": jd["digest"] if jd else None,
+        "jd_raw_tokens": (jd["raw_tokens"] or 0) if jd else 0,
+        "jd_digest_tokens": (jd["digest_tokens"] or 0) if jd else 0,
+        "checked_until": time.monotonic() + CONFIG_VERSION_CHECK_INTERVAL,
+    }
+
+
+def get_config_snapshot() -> dict:
+    """
+    Cached admin-managed settings. Zero queries while fresh; afterwards a
+    single version probe, and a reload only if an admin changed something.
+    """
+    global _config_snapshot
+    snap = _config_snapshot
+    if snap and time.monotonic() < snap["checked_until"]:
+        return snap
+
+    with _config_lock:
+        snap = _config_snapshot
+        if snap and time.monotonic() < snap["checked_until"]:
+            return snap
+
+        if snap:
+            with get_db() as db:
+                version = _read_config_version(db)
+            if version == snap["version"]:
+                snap["checked_until"] = time.monotonic() + CONFIG_VERSION_CHECK_INTERVAL
+                return snap
+
+        _config_snapshot = _load_config_snapshot()
+        return _config_snapshot
+
+
+def bump_config_version(db):
+    """Call inside the transaction that changes admin-managed config."""
+    db.execute("UPDATE config_version SET version = version + 1 WHERE id = 1")
+
+
+def invalidate_config_cache():
+    """Drop this process's snapshot (call after the bump has committed)."""
+    global _config_snapshot
+    with _config_lock:
+        _config_snapshot = None
+
+
+def get_question_limits():
+    """
+    Returns:
+      total_questions, consequential_max, followup_max
+    """
+    return get_config_snapshot()["question_limits"]
+
+
+def get_pass_threshold() -> float:
+    return get_config_snapshot()["pass_threshold"]
 
-    if not row:
-        # Default fallback if DB empty
-        return 5, 3, 2
 
-    return (
-        row["total_questions"],
-        row["consequential_max"],
-        row["followup_max"]
-    )
+def get_job_description_text() -> str:
+    return get_config_snapshot()["job_description"]
@@ -1,145 +1,107 @@
+import asyncio
+import os
+import queue
 import sqlite3
+import threading
 from contextlib import contextmanager
 
 DATABASE_NAME = "interviewer.db"
 
+# Connection pool + per-connection PRAGMAs (env-configurable)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "16"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "WAL")
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+
+# Idle connections, most recently used first (keeps page caches warm)
+_pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+_pool_stats = {"opened": 0, "closed": 0, "reused": 0}
+_pool_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    # Pooled connections hop between threads, but only one holder at a time
+    conn = sqlite3.connect(
+        DATABASE_NAME,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+    )
+    conn.row_factory = sqlite3.Row  # dict-like access to columns
+    conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA journal_mode={DB_JOURNAL_MODE}")
+    conn.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    with _pool_lock:
+        _pool_stats["opened"] += 1
+    return conn
+
+
+def _release(conn: sqlite3.Connection):
+    try:
+        _pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+        with _pool_lock:
+            _pool_stats["closed"] += 1
+
+
 @contextmanager
 def get_db():
-    conn = sqlite3.connect(DATABASE_NAME)
-    conn.row_factory = sqlite3.Row  # dict-like access to columns
+    """
+    Borrow a pooled connection for one unit of work.
+    Commits on success, rolls back on error, then returns it to the pool.
+    """
+    try:
+        conn = _pool.get_nowait()
+        with _pool_lock:
+            _pool_stats["reused"] += 1
+    except queue.Empty:
+        conn = _connect()
+
     try:
         yield conn
         conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
     finally:
+        _release(conn)
+
+
+def close_pool():
+    """Close all idle pooled connections."""
+    while True:
+        try:
+            conn = _pool.get_nowait()
+        except queue.Empty:
+            return
         conn.close()
+        with _pool_lock:
+            _pool_stats["closed"] += 1
+
+
+def get_pool_stats() -> dict:
+    with _pool_lock:
+        return {**_pool_stats, "idle": _pool.qsize(), "max_idle": DB_POOL_SIZE}
+
+
+async def run_db(fn, *args, **kwargs):
+    """
+    Run a blocking DB helper on a worker thread so async routes
+    never stall the event loop on sqlite I/O or lock waits.
+    """
+    return await asyncio.to_thread(fn, *args, **kwargs)
 
 
 def init_db():
-    with get_db() as db:
-        # Users table
-        db.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            api_key TEXT UNIQUE NOT NULL
-        );
-        """)
-
-        # Global Job Description
-        db.execute("""
-        CREATE TABLE IF NOT EXISTS job_description (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            content TEXT NOT NULL,
-            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        );
-        """)
-
-        # Interview Session
-        # Interview Session
-        db.execute("""
-        CREATE TABLE IF NOT EXISTS interviews (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            resume_blob BLOB,
-            resume_text TEXT,
-            status TEXT NOT NULL,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        );
-        """)
-
-        # Add candidate_profile column if not exists
-        existing_cols = [col["name"] for col in db.execute("PRAGMA table_info(interviews);")]
-        if "candidate_profile" not in existing_cols:
-            db.execute("ALTER TABLE interviews ADD COLUMN candidate_profile TEXT;")
-
-
-        # Skills``
-        db.execute("""
-        CREATE TABLE IF NOT EXISTS skills (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            interview_id INTEGER NOT NULL,
-            name TEXT NOT NULL,
-            importance_score INTEGER CHECK(importance_score BETWEEN 1 AND 100),
-            confidence_score INTEGER CHECK(confidence_score BETWEEN 1 AND 100),
-            FOREIGN KEY (interview_id) REFERENCES interviews(id)
-        );
-        """)
-
-        # Questions
-        db.execute("""
-        CREATE TABLE IF NOT EXISTS questions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            interview_id INTEGER NOT NULL,
-            question_text TEXT NOT NULL,
-            source_type TEXT CHECK(source_type IN ('consequential','followup')),
-            asked BOOLEAN DEFAULT 0,
-            FOREIGN KEY (interview_id) REFERENCES interviews(id)
-        );
-        """)
-
-        # Answers
-        db.execute("""
-        CREATE TABLE IF NOT EXISTS answers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            question_id INTEGER NOT NULL,
-            answer_text TEXT,
-            score INTEGER,
-            retry_used BOOLEAN DEFAULT 0,
-            FOREIGN KEY (question_id) REFERENCES questions(id)
-        );
-        """)
-
-        # Interview State Enum (values we enforce manually)
-        # UPLOADED_RESUME, GENERATING_QUESTIONS, IN_PROGRESS, COMPLETED, FAILED, ABORTED
-
-        print("Database initialized successfully.")
-
-        # db.execute("""
-        # ALTER TABLE interviews
-        # ADD COLUMN candidate_profile TEXT;
-        # """)
-
-        db.execute("""
-        CREATE TABLE IF NOT EXISTS question_config (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            total_questions INTEGER DEFAULT 5,
-            consequential_max INTEGER DEFAULT 3,
-            followup_max INTEGER DEFAULT 2
-        );
-        """)
-
-        existing = db.execute("SELECT COUNT(*) cnt FROM question_config").fetchone()["cnt"]
-        if existing == 0:
-            db.execute("INSERT INTO question_config (total_questions, consequential_max, followup_max) VALUES (5, 3, 2)")
-            
-        # Seed Admin User
-        admin_exists = db.execute("SELECT COUNT(*) cnt FROM users WHERE username='admin'").fetchone()["cnt"]
-        if admin_exists == 0:
-            from app.utils.security import hash_password, generate_api_key
-            hashed = hash_password("admin")
-            key = generate_api_key()
-            db.execute(
-                "INSERT INTO users (username, password, api_key) VALUES (?, ?, ?)",
-                ("admin", hashed, key)
-            )
-            print(f"Admin user created. Key: {key}")
-
-        # Pass Threshold Table
-        db.execute("""
-        CREATE TABLE IF NOT EXISTS pass_threshold (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            value REAL DEFAULT 0.7  -- 70% default cutoff score
-        );
-        """)
-
-        # Ensure 1 config row always exists
-        exists = db.execute("SELECT COUNT(*) AS cnt FROM pass_threshold").fetchone()["cnt"]
-        if exists == 0:
-            db.execute("INSERT INTO pass_threshold (value) VALUES (0.7)")
-
-        # Add final_report column if not exists
-        existing_cols = [col["name"] for col in db.execute("PRAGMA table_info(interviews);")]
-        if "final_report" not in existing_cols:
-            db.execute("ALTER TABLE interviews ADD COLUMN final_report TEXT;")
+    # Drop idle connections so a recreated database file is picked up
+    close_pool()
+
+    from app.migrations import run_migrations
+    version = run_migrations()
+
+    print(f"Database initialized successfully (schema v{version}).")
@@ -1,5 +1,8 @@
 from fastapi import FastAPI
 from app.database import init_db
+from app.config import MAX_PDF_SIZE, MAX_JD_PDF_SIZE, BULK_INGEST_MAX_BYTES
+from app.utils.uploads import UploadSizeLimitMiddleware
+from app.utils.compression import CompressionMiddleware
 
 from app.routers import (
     auth_routes,
@@ -14,14 +17,33 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Reject oversized PDF uploads while the body is still arriving
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/interviews/upload_resume": MAX_PDF_SIZE,
+        "/admin/set_job_description": MAX_JD_PDF_SIZE,
+        "/admin/bulk_ingest": BULK_INGEST_MAX_BYTES,
+    },
+)
+
+# Compress large JSON (reports, candidate lists); not SSE or PDF downloads
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=1024,
+    exclude_suffixes=("/stream", "/resume"),
+)
+
 from fastapi.middleware.cors import CORSMiddleware
 
+# Added last so it is the outermost layer: early 413s still get CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # keyset paging on /admin/candidates
 )
 
 init_db()  # ensures database tables exist
@@ -0,0 +1,87 @@
+"""
+Database maintenance commands.
+
+    python -m app.maintenance check-counters [--repair]
+    python -m app.maintenance clear-llm-cache
+    python -m app.maintenance rebuild-candidate-summary
+"""
+import argparse
+
+from app.database import get_db, init_db
+from app.migrations import BACKFILL_PROGRESS_COUNTERS
+from app.services import llm_cache, candidate_summary
+
+COUNTER_COLUMNS = ("answered_count", "consequential_asked", "followup_asked")
+
+
+def check_interview_counters(repair: bool = False) -> list:
+    """
+    Compare the denormalized progress counters on interviews with the
+    values recomputed from questions/answers. Returns the mismatching
+    rows; with repair=True they are rewritten in the same transaction.
+    """
+    with get_db() as db:
+        rows = db.execute("""
+            SELECT i.id,
+                   i.answered_count, i.consequential_asked, i.followup_asked,
+                   (SELECT COUNT(*) FROM answers a
+                    JOIN questions q ON q.id = a.question_id
+                    WHERE q.interview_id = i.id AND a.score IS NOT NULL) AS expected_answered,
+                   (SELECT COUNT(*) FROM questions q
+                    WHERE q.interview_id = i.id AND q.asked = 1
+                      AND q.source_type = 'consequential') AS expected_consequential,
+                   (SELECT COUNT(*) FROM questions q
+                    WHERE q.interview_id = i.id AND q.asked = 1
+                      AND q.source_type = 'followup') AS expected_followup
+            FROM interviews i
+        """).fetchall()
+
+        mismatches = []
+        for r in rows:
+            actual = (r["answered_count"], r["consequential_asked"], r["followup_asked"])
+            expected = (r["expected_answered"], r["expected_consequential"], r["expected_followup"])
+            if actual != expected:
+                mismatches.append({
+                    "interview_id": r["id"],
+                    "stored": dict(zip(COUNTER_COLUMNS, actual)),
+                    "expected": dict(zip(COUNTER_COLUMNS, expected)),
+                })
+
+        if repair and mismatches:
+            db.execute(BACKFILL_PROGRESS_COUNTERS)
+
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    counters = sub.add_parser("check-counters", help="verify interview progress counters")
+    counters.add_argument("--repair", action="store_true", help="rewrite mismatching counters")
+
+    sub.add_parser("clear-llm-cache", help="drop all cached LLM responses")
+    sub.add_parser("rebuild-candidate-summary", help="recompute the admin candidate listing")
+
+    args = parser.parse_args()
+    init_db()
+
+    if args.command == "check-counters":
+        mismatches = check_interview_counters(repair=args.repair)
+        for m in mismatches:
+            print(f"interview {m['interview_id']}: stored={m['stored']} expected={m['expected']}")
+        action = "repaired" if args.repair else "found"
+        print(f"{len(mismatches)} inconsistent interview(s) {action}.")
+
+    elif args.command == "clear-llm-cache":
+        llm_cache.clear()
+        print("LLM response cache cleared.")
+
+    elif args.command == "rebuild-candidate-summary":
+        with get_db() as db:
+            candidate_summary.rebuild(db)
+        print("Candidate summary rebuilt.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+"""
+Versioned schema migrations.
+
+Each migration runs once, in order, inside its own write transaction and
+is recorded in schema_version. Startup only reads the current version
+when the schema is already up to date.
+
+To change the schema, append a new @migration(N, "...") function;
+never edit one that has shipped. Migrations that free a lot of pages can
+ask for vacuum=True; VACUUM then runs once after all pending migrations,
+outside any transaction.
+"""
+from app.database import get_db
+
+MIGRATIONS = []
+
+
+def migration(version: int, name: str, vacuum: bool = False):
+    def register(fn):
+        MIGRATIONS.append((version, name, fn, vacuum))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+def _columns(db, table: str) -> list:
+    return [col["name"] for col in db.execute(f"PRAGMA table_info({table});")]
+
+
+@migration(1, "baseline schema")
+def _baseline(db):
+    # Idempotent so databases created before versioning adopt it cleanly
+
+    # Users table
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        api_key TEXT UNIQUE NOT NULL
+    );
+    """)
+
+    # Global Job Description
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS job_description (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        content TEXT NOT NULL,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+
+    # Interview Session
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS interviews (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        resume_blob BLOB,
+        resume_text TEXT,
+        status TEXT NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    );
+    """)
+
+    # Add candidate_profile column if not exists
+    if "candidate_profile" not in _columns(db, "interviews"):
+        db.execute("ALTER TABLE interviews ADD COLUMN candidate_profile TEXT;")
+
+
+    # Skills
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS skills (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        interview_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        importance_score INTEGER CHECK(importance_score BETWEEN 1 AND 100),
+        confidence_score INTEGER CHECK(confidence_score BETWEEN 1 AND 100),
+        FOREIGN KEY (interview_id) REFERENCES interviews(id)
+    );
+    """)
+
+    # Questions
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS questions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        interview_id INTEGER NOT NULL,
+        question_text TEXT NOT NULL,
+        source_type TEXT CHECK(source_type IN ('consequential','followup')),
+        asked BOOLEAN DEFAULT 0,
+        FOREIGN KEY (interview_id) REFERENCES interviews(id)
+    );
+    """)
+
+    # Answers
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS answers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        question_id INTEGER NOT NULL,
+        answer_text TEXT,
+        score INTEGER,
+        retry_used BOOLEAN DEFAULT 0,
+        FOREIGN KEY (question_id) REFERENCES questions(id)
+    );
+    """)
+
+    # Interview State Enum (values we enforce manually)
+    # UPLOADED_RESUME, GENERATING_QUESTIONS, IN_PROGRESS, COMPLETED, FAILED, ABORTED
+
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS question_config (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        total_questions INTEGER DEFAULT 5,
+        consequential_max INTEGER DEFAULT 3,
+        followup_max INTEGER DEFAULT 2
+    );
+    """)
+
+    existing = db.execute("SELECT COUNT(*) cnt FROM question_config").fetchone()["cnt"]
+    if existing == 0:
+        db.execute("INSERT INTO question_config (total_questions, consequential_max, followup_max) VALUES (5, 3, 2)")
+        
+    # Seed Admin User
+    admin_exists = db.execute("SELECT COUNT(*) cnt FROM users WHERE username='admin'").fetchone()["cnt"]
+    if admin_exists == 0:
+        from app.utils.security import hash_password, generate_api_key
+        hashed = hash_password("admin")
+        key = generate_api_key()
+        db.execute(
+            "INSERT INTO users (username, password, api_key) VALUES (?, ?, ?)",
+            ("admin", hashed, key)
+        )
+        print(f"Admin user created. Key: {key}")
+
+    # Pass Threshold Table
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS pass_threshold (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        value REAL DEFAULT 0.7  -- 70% default cutoff score
+    );
+    """)
+
+    # Ensure 1 config row always exists
+    exists = db.execute("SELECT COUNT(*) AS cnt FROM pass_threshold").fetchone()["cnt"]
+    if exists == 0:
+        db.execute("INSERT INTO pass_threshold (value) VALUES (0.7)")
+
+    # Add final_report column if not exists
+    if "final_report" not in _columns(db, "interviews"):
+        db.execute("ALTER TABLE interviews ADD COLUMN final_report TEXT;")
+
+    # Background jobs (question pre-generation, ...)
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        interview_id INTEGER,
+        status TEXT NOT NULL DEFAULT 'queued'
+            CHECK(status IN ('queued','running','done','failed')),
+        progress REAL DEFAULT 0,
+        error TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (interview_id) REFERENCES interviews(id)
+    );
+    """)
+
+    # At most one active job per (kind, interview): duplicates collapse
+    db.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active
+    ON jobs(kind, interview_id)
+    WHERE status IN ('queued','running');
+    """)
+
+
+@migration(2, "hot-path indexes")
+def _hot_path_indexes(db):
+    # Unasked/asked lookups and per-type counts for one interview
+    db.execute("""
+    CREATE INDEX IF NOT EXISTS idx_questions_interview_asked_type
+    ON questions(interview_id, asked, source_type);
+    """)
+
+    # One answer row per question (retries update it in place);
+    # drop any historical duplicates first, keeping the latest
+    db.execute("""
+    DELETE FROM answers
+    WHERE id NOT IN (SELECT MAX(id) FROM answers GROUP BY question_id);
+    """)
+    db.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_answers_question
+    ON answers(question_id);
+    """)
+
+    # One confidence row per skill per interview
+    db.execute("""
+    DELETE FROM skills
+    WHERE id NOT IN (SELECT MAX(id) FROM skills GROUP BY interview_id, name);
+    """)
+    db.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_skills_interview_name
+    ON skills(interview_id, name);
+    """)
+
+    # Latest interview per user (admin candidate listing)
+    db.execute("""
+    CREATE INDEX IF NOT EXISTS idx_interviews_user_created
+    ON interviews(user_id, created_at);
+    """)
+
+    # Latest job of a kind for an interview
+    db.execute("""
+    CREATE INDEX IF NOT EXISTS idx_jobs_kind_interview
+    ON jobs(kind, interview_id, id);
+    """)
+
+
+@migration(3, "interview progress counters")
+def _progress_counters(db):
+    # Denormalized so each turn reads one row instead of several COUNT(*)s;
+    # kept in step by the writes that mark questions asked / finalize scores
+    cols = _columns(db, "interviews")
+    for col in ("answered_count", "consequential_asked", "followup_asked"):
+        if col not in cols:
+            db.execute(f"ALTER TABLE interviews ADD COLUMN {col} INTEGER NOT NULL DEFAULT 0;")
+
+    db.execute(BACKFILL_PROGRESS_COUNTERS)
+
+
+@migration(4, "skill confidence history")
+def _skill_confidence_history(db):
+    # Every per-answer confidence value; skills keeps only the latest
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS skill_confidence_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        interview_id INTEGER NOT NULL,
+        question_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        confidence_score INTEGER CHECK(confidence_score BETWEEN 1 AND 100),
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (interview_id) REFERENCES interviews(id),
+        FOREIGN KEY (question_id) REFERENCES questions(id)
+    );
+    """)
+    db.execute("""
+    CREATE INDEX IF NOT EXISTS idx_skill_history_interview_name
+    ON skill_confidence_history(interview_id, name);
+    """)
+
+
+@migration(5, "config version")
+def _config_version(db):
+    # Bumped by /admin/set_* so cached config snapshots know to reload
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS config_version (
+        id INTEGER PRIMARY KEY CHECK(id = 1),
+        version INTEGER NOT NULL DEFAULT 0
+    );
+    """)
+    db.execute("INSERT OR IGNORE INTO config_version (id, version) VALUES (1, 0)")
+
+
+@migration(6, "job description digest")
+def _jd_digest(db):
+    # Compact rendering of the JD used in prompts, plus token counts
+    cols = _columns(db, "job_description")
+    if "digest" not in cols:
+        db.execute("ALTER TABLE job_description ADD COLUMN digest TEXT;")
+    if "raw_tokens" not in cols:
+        db.execute("ALTER TABLE job_description ADD COLUMN raw_tokens INTEGER;")
+    if "digest_tokens" not in cols:
+        db.execute("ALTER TABLE job_description ADD COLUMN digest_tokens INTEGER;")
+
+
+@migration(7, "llm response cache")
+def _llm_cache(db):
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            bytes INTEGER NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            last_used_at REAL NOT NULL
+        );
+    """)
+    db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used_at);")
+
+
+@migration(8, "resume fingerprints")
+def _resume_fingerprints(db):
+    # Extracted text + parsed profile per distinct resume PDF (sha256 of the bytes)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS resume_fingerprints (
+            sha256 TEXT PRIMARY KEY,
+            resume_text TEXT NOT NULL,
+            candidate_profile TEXT NOT NULL,
+            uses INTEGER NOT NULL DEFAULT 1,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_used_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+
+@migration(9, "resume blob store", vacuum=True)
+def _resume_blob_store(db):
+    # Resume PDFs move to the on-disk blob store; interviews keep the hash
+    from app.utils import blob_store
+
+    if "resume_hash" not in _columns(db, "interviews"):
+        db.execute("ALTER TABLE interviews ADD COLUMN resume_hash TEXT;")
+
+    # One blob in memory at a time
+    ids = [r["id"] for r in db.execute(
+        "SELECT id FROM interviews WHERE resume_blob IS NOT NULL"
+    ).fetchall()]
+    for interview_id in ids:
+        blob = db.execute(
+            "SELECT resume_blob FROM interviews WHERE id=?", (interview_id,)
+        ).fetchone()["resume_blob"]
+        digest = blob_store.put(bytes(blob))
+        db.execute(
+            "UPDATE interviews SET resume_hash=?, resume_blob=NULL WHERE id=?",
+            (digest, interview_id)
+        )
+    if ids:
+        print(f"Moved {len(ids)} resume blob(s) to the blob store")
+
+
+@migration(10, "job items")
+def _job_items(db):
+    # Per-file progress of bulk jobs (one row per uploaded resume)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS job_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            username TEXT,
+            user_id INTEGER,
+            resume_hash TEXT,
+            status TEXT NOT NULL DEFAULT 'queued'
+                CHECK(status IN ('queued','done','failed')),
+            interview_id INTEGER,
+            error TEXT,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (job_id) REFERENCES jobs(id),
+            FOREIGN KEY (interview_id) REFERENCES interviews(id)
+        );
+    """)
+    db.execute("CREATE INDEX IF NOT EXISTS idx_job_items_job ON job_items(job_id, position);")
+
+
+@migration(11, "candidate summary")
+def _candidate_summary(db):
+    # Precomputed admin candidate listing (see app/services/candidate_summary.py);
+    # latest_at is '' and score 0 until the candidate has an interview / scores,
+    # so keyset pagination never has to deal with NULL sort keys
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS candidate_summary (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL,
+            interview_id INTEGER,
+            status TEXT NOT NULL DEFAULT 'NO_INTERVIEW',
+            score REAL NOT NULL DEFAULT 0,
+            final_percentage REAL,
+            domain TEXT,
+            latest_at TEXT NOT NULL DEFAULT '',
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (interview_id) REFERENCES interviews(id)
+        );
+    """)
+    db.execute("CREATE INDEX IF NOT EXISTS idx_summary_recent ON candidate_summary(latest_at, user_id);")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_summary_score ON candidate_summary(score, user_id);")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_summary_status_recent ON candidate_summary(status, latest_at, user_id);")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_summary_status_score ON candidate_summary(status, score, user_id);")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_summary_interview ON candidate_summary(interview_id);")
+    db.execute(REBUILD_CANDIDATE_SUMMARY)
+
+
+@migration(12, "report score columns")
+def _report_score_columns(db):
+    # Ranking fields out of the final_report / candidate_profile JSON
+    cols = _columns(db, "interviews")
+    if "final_percentage" not in cols:
+        db.execute("ALTER TABLE interviews ADD COLUMN final_percentage REAL;")
+    if "final_score" not in cols:
+        db.execute("ALTER TABLE interviews ADD COLUMN final_score INTEGER;")
+    if "recommendation" not in cols:
+        db.execute("ALTER TABLE interviews ADD COLUMN recommendation TEXT;")
+    if "domain" not in cols:
+        db.execute("ALTER TABLE interviews ADD COLUMN domain TEXT COLLATE NOCASE;")
+
+    db.execute("""
+        UPDATE interviews SET
+            final_percentage = json_extract(final_report, '$.final_percentage'),
+            final_score = json_extract(final_report, '$.final_score'),
+            recommendation = json_extract(final_report, '$.recommendation')
+        WHERE json_valid(final_report)
+    """)
+    db.execute("""
+        UPDATE interviews SET domain = json_extract(candidate_profile, '$.domain')
+        WHERE json_valid(candidate_profile)
+    """)
+
+    # Leaderboard: top-K by final percentage, overall and per domain
+    db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_interviews_final_pct
+        ON interviews(final_percentage DESC, id)
+        WHERE final_percentage IS NOT NULL;
+    """)
+    db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_interviews_domain_final_pct
+        ON interviews(domain, final_percentage DESC, id)
+        WHERE final_percentage IS NOT NULL;
+    """)
+
+
+@migration(13, "report etag")
+def _report_etag(db):
+    # Hash of the stored report JSON, served as its ETag
+    import hashlib
+
+    if "report_etag" not in _columns(db, "interviews"):
+        db.execute("ALTER TABLE interviews ADD COLUMN report_etag TEXT;")
+
+    # Corrupt reports keep a NULL etag so the route still detects them
+    rows = db.execute(
+        "SELECT id, final_report FROM interviews WHERE json_valid(final_report)"
+    ).fetchall()
+    db.executemany(
+        "UPDATE interviews SET report_etag=? WHERE id=?",
+        [(hashlib.sha256(r["final_report"].encode("utf-8")).hexdigest()[:32], r["id"]) for r in rows]
+    )
+
+
+
+@migration(14, "leaderboard best-per-user index")
+def _leaderboard_user_index(db):
+    # Lets the leaderboard check "is there a better interview for this
+    # user?" with one index probe per candidate row
+    db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_interviews_user_final_pct
+        ON interviews(user_id, final_percentage DESC, id)
+        WHERE final_percentage IS NOT NULL;
+    """)
+
+# Recomputes the counters from questions/answers (also used by app.maintenance)
+BACKFILL_PROGRESS_COUNTERS = """
+UPDATE interviews SET
+    answered_count = (
+        SELECT COUNT(*) FROM answers a
+        JOIN questions q ON q.id = a.question_id
+        WHERE q.interview_id = interviews.id AND a.score IS NOT NULL
+    ),
+    consequential_asked = (
+        SELECT COUNT(*) FROM questions q
+        WHERE q.interview_id = interviews.id AND q.asked = 1
+          AND q.source_type = 'consequential'
+    ),
+    followup_asked = (
+        SELECT COUNT(*) FROM questions q
+        WHERE q.interview_id = interviews.id AND q.asked = 1
+          AND q.source_type = 'followup'
+    )
+"""
+
+
+# Fills candidate_summary from scratch (each candidate's latest interview)
+REBUILD_CANDIDATE_SUMMARY = """
+INSERT INTO candidate_summary
+    (user_id, username, interview_id, status, score, final_percentage, domain, latest_at)
+SELECT
+    u.id,
+    u.username,
+    i.id,
+    COALESCE(i.status, 'NO_INTERVIEW'),
+    COALESCE((
+        SELECT AVG(a.score)
+        FROM answers a
+        JOIN questions q ON a.question_id = q.id
+        WHERE q.interview_id = i.id AND a.score IS NOT NULL
+    ), 0),
+    CASE WHEN json_valid(i.final_report)
+         THEN json_extract(i.final_report, '$.final_percentage') END,
+    CASE WHEN json_valid(i.candidate_profile)
+         THEN json_extract(i.candidate_profile, '$.domain') END,
+    COALESCE(i.created_at, '')
+FROM users u
+LEFT JOIN interviews i ON i.id = (
+    SELECT id FROM interviews
+    WHERE user_id = u.id
+    ORDER BY created_at DESC, id DESC
+    LIMIT 1
+)
+WHERE u.username != 'admin'
+"""
+
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(db) -> int:
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+    return db.execute("SELECT COALESCE(MAX(version), 0) AS v FROM schema_version").fetchone()["v"]
+
+
+def run_migrations() -> int:
+    """Apply pending migrations; returns the resulting schema version."""
+    with get_db() as db:
+        current = get_schema_version(db)
+
+    # Fast path: nothing to do
+    if current >= LATEST_VERSION:
+        return current
+
+    needs_vacuum = False
+    for version, name, fn, vacuum in MIGRATIONS:
+        if version <= current:
+            continue
+        with get_db() as db:
+            # Take the write lock first so concurrent workers apply each step once
+            db.execute("BEGIN IMMEDIATE")
+            if get_schema_version(db) >= version:
+                continue
+            fn(db)
+            db.execute(
+                "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                (version, name)
+            )
+            print(f"Applied migration {version}: {name}")
+        current = version
+        needs_vacuum = needs_vacuum or vacuum
+
+    if needs_vacuum:
+        # Cannot run inside a transaction; rewrites the file to reclaim pages
+        with get_db() as db:
+            db.execute("VACUUM")
+        print("Database vacuumed.")
+
+    return current
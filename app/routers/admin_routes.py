@@ -1,13 +1,32 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.database import get_db
-from app.utils.security import verify_api_key
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from app.database import get_db, run_db, get_pool_stats
+from app.utils.security import verify_api_key, get_auth_cache_stats
+from app.config import bump_config_version, invalidate_config_cache, MAX_JD_PDF_SIZE
+from app.services.llm_gateway import get_llm_stats
+from app.services.llm_cache import get_cache_stats
+from app.services.question_inventory import get_inventory_stats, get_inventory_totals
+from app.services.question_service import get_speculation_stats
+from app.services.prompt_builder import get_prompt_stats
+from app.services.resume_service import get_resume_dedup_stats
+from app.services.bulk_ingest import create_bulk_job, get_bulk_job
+from app.services import candidate_summary
+from app.services.jd_service import (
+    build_jd_digest,
+    build_jd_digest_async,
+    jd_token_counts,
+    get_jd_prompt_stats,
+)
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 
-from fastapi import UploadFile, File
-from app.utils.pdf2text import extract_text_from_pdf
+from typing import List
+from fastapi import UploadFile, File, Form
+from fastapi.responses import JSONResponse, ORJSONResponse
+from app.utils.pdf2text import extract_text_from_pdf, get_pdf_stats
+from app.utils.uploads import spooled_upload
 
 @router.post("/set_job_description")
 async def set_job_description(
@@ -17,22 +36,69 @@ async def set_job_description(
     if user["username"] != "admin":
         raise HTTPException(status_code=403, detail="Only admin can update JD")
 
-    # Read and extract text from PDF
-    pdf_bytes = await file.read()
-    jd_text = extract_text_from_pdf(pdf_bytes)
+    # Extract text from the spooled upload (off the event loop)
+    pdf_file = spooled_upload(file, MAX_JD_PDF_SIZE)
+    jd_text = await asyncio.to_thread(extract_text_from_pdf, pdf_file)
 
     if not jd_text or len(jd_text.strip()) == 0:
         raise HTTPException(status_code=400, detail="Invalid or unreadable JD PDF")
 
-    # Store JD as plaintext only
+    # Store JD as plaintext plus the compact digest used in prompts
+    digest = await build_jd_digest_async(jd_text)
+    tokens = await run_db(_store_job_description, jd_text, digest)
+
+    return {"message": "Job description updated successfully", **tokens}
+
+
+def _store_job_description(content: str, digest: str = None) -> dict:
+    tokens = jd_token_counts(content, digest)
     with get_db() as db:
         db.execute("DELETE FROM job_description")
         db.execute(
-            "INSERT INTO job_description (content) VALUES (?)",
-            (jd_text,)
+            "INSERT INTO job_description (content, digest, raw_tokens, digest_tokens) "
+            "VALUES (?, ?, ?, ?)",
+            (content, digest, tokens["raw_tokens"], tokens["digest_tokens"])
         )
+        bump_config_version(db)
+    invalidate_config_cache()
+    return tokens
+
+
+@router.post("/bulk_ingest")
+async def bulk_ingest(
+    files: List[UploadFile] = File(...),
+    usernames: str = Form(None),
+    user=Depends(verify_api_key)
+):
+    """
+    Queue resumes (PDFs and/or ZIPs of PDFs) for several candidates.
+    `usernames` is a comma-separated list matching the accepted PDFs in
+    order; without it each PDF's file name is used as the username.
+    """
+    if user["username"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+
+    names = [u.strip() for u in usernames.split(",") if u.strip()] if usernames else None
+    uploads = [(f.filename or "", f.file) for f in files]
+
+    try:
+        # Hashing, unzipping and blob writes off the event loop
+        result = await asyncio.to_thread(create_bulk_job, uploads, names)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return JSONResponse(status_code=202, content=result)
 
-    return {"message": "Job description updated successfully"}
+
+@router.get("/bulk_ingest/{job_id}")
+def get_bulk_ingest(job_id: int, user=Depends(verify_api_key)):
+    if user["username"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+
+    job = get_bulk_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    return job
 
 
 class JDContent(BaseModel):
@@ -50,14 +116,10 @@ def set_job_description_content(
     if not data.content.strip():
         raise HTTPException(status_code=400, detail="Content cannot be empty")
 
-    with get_db() as db:
-        db.execute("DELETE FROM job_description")
-        db.execute(
-            "INSERT INTO job_description (content) VALUES (?)",
-            (data.content,)
-        )
+    digest = build_jd_digest(data.content)
+    tokens = _store_job_description(data.content, digest)
 
-    return {"message": "Job description updated successfully"}
+    return {"message": "Job description updated successfully", **tokens}
 
 from pydantic import BaseModel
 
@@ -77,6 +139,8 @@ def set_threshold(data: ThresholdUpdate, user=Depends(verify_api_key)):
     with get_db() as db:
         db.execute("DELETE FROM pass_threshold")
         db.execute("INSERT INTO pass_threshold (value) VALUES (?)", (val,))
+        bump_config_version(db)
+    invalidate_config_cache()
 
     return {"message": f"Hiring threshold set to {val * 100:.1f}%"}
 
@@ -90,12 +154,20 @@ def set_question_config(cfg: QuestionConfigUpdate, user=Depends(verify_api_key))
     if user["username"] != "admin":
         raise HTTPException(status_code=403, detail="Admin only")
 
+    if cfg.consequential_max + cfg.followup_max < cfg.total_questions:
+        raise HTTPException(
+            status_code=400,
+            detail="consequential_max + followup_max must be at least total_questions"
+        )
+
     with get_db() as db:
         db.execute("DELETE FROM question_config")
         db.execute(
             "INSERT INTO question_config (total_questions, consequential_max, followup_max) VALUES (?, ?, ?)",
             (cfg.total_questions, cfg.consequential_max, cfg.followup_max)
         )
+        bump_config_version(db)
+    invalidate_config_cache()
 
     return {"message": "Question config updated successfully", "config": cfg}
 
@@ -122,54 +194,133 @@ def get_question_config(user=Depends(verify_api_key)):
     }
 
 
-@router.get("/candidates")
-def list_candidates(user=Depends(verify_api_key)):
+@router.get("/candidates", response_class=ORJSONResponse)
+def list_candidates(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    sort: str = "recent",
+    order: str = "desc",
+    status: str = None,
+    min_score: float = None,
+    max_score: float = None,
+    cursor: str = None,
+    user=Depends(verify_api_key)
+):
+    """
+    Candidates with their latest interview, one page at a time from the
+    precomputed candidate_summary table. The next page's cursor is
+    returned in the X-Next-Cursor header (absent on the last page).
+    """
+    if user["username"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+
+    try:
+        rows, next_cursor = candidate_summary.list_candidates(
+            limit, sort=sort, order=order, status=status,
+            min_score=min_score, max_score=max_score, cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return [
+        {
+            "id": r["interview_id"],  # Can be None
+            "user_id": r["user_id"],
+            "name": r["username"],
+            "score": round(r["score"], 1),
+            "final_percentage": r["final_percentage"],
+            "domain": r["domain"] or "General",
+            "status": r["status"],
+        }
+        for r in rows
+    ]
+
+
+@router.get("/leaderboard", response_class=ORJSONResponse)
+def leaderboard(
+    k: int = Query(10, ge=1, le=100),
+    domain: str = None,
+    user=Depends(verify_api_key)
+):
+    """
+    Top-K candidates by their best reported interview (by final
+    percentage), optionally within one domain.
+    """
     if user["username"] != "admin":
         raise HTTPException(status_code=403, detail="Admin only")
 
-    # Fetch candidates with some aggregated stats
-    # Fetch candidates with some aggregated stats
+    # Walks idx_interviews_final_pct / idx_interviews_domain_final_pct in
+    # order and stops after k rows; a row is skipped when the same user has
+    # a better one (a probe on idx_interviews_user_final_pct)
+    where = "i.final_percentage IS NOT NULL"
+    better = ""
+    params = []
+    if domain:
+        where += " AND i.domain = ?"
+        better = "AND j.domain = i.domain"
+        params.append(domain)
+
     with get_db() as db:
-        # Get all users (except admin), joined with their interviews (if any)
-        # If multiple interviews, this returns multiple rows per user (which is fine, distinct candidacies)
-        # If no interview, returns one row with null interview fields
-        rows = db.execute("""
-            SELECT 
-                u.id as user_id,
-                u.username as name,
-                i.id as interview_id,
-                i.status,
-                i.created_at,
-                (
-                    SELECT AVG(a.score) 
-                    FROM answers a 
-                    JOIN questions q ON a.question_id = q.id 
-                    WHERE q.interview_id = i.id AND a.score IS NOT NULL
-                ) as avg_score
-            FROM users u
-            LEFT JOIN interviews i ON i.id = (
-                SELECT id FROM interviews 
-                WHERE user_id = u.id 
-                ORDER BY created_at DESC 
-                LIMIT 1
-            )
-            WHERE u.username != 'admin'
-            ORDER BY i.created_at DESC
-        """).fetchall()
-        
-        candidates = []
-        for r in rows:
-            score = r["avg_score"] if r["avg_score"] else 0.0
-            status = r["status"] if r["status"] else "NO_INTERVIEW"
-            interview_id = r["interview_id"] # Matches SQL alias
-
-            candidates.append({
-                "id": interview_id, # Can be None
-                "user_id": r["user_id"],
-                "name": r["name"],
-                "score": round(score, 1),
-                "domain": "General", 
-                "status": status
-            })
-            
-    return candidates
+        rows = db.execute(f"""
+            SELECT i.id, i.user_id, u.username, i.domain,
+                   i.final_percentage, i.final_score, i.recommendation
+            FROM interviews i
+            JOIN users u ON u.id = i.user_id
+            WHERE {where}
+              AND NOT EXISTS (
+                  SELECT 1 FROM interviews j
+                  WHERE j.user_id = i.user_id
+                    AND j.final_percentage IS NOT NULL
+                    AND (j.final_percentage > i.final_percentage
+                         OR (j.final_percentage = i.final_percentage AND j.id < i.id))
+                    {better}
+              )
+            ORDER BY i.final_percentage DESC, i.id
+            LIMIT ?
+        """, (*params, k)).fetchall()
+
+    return [
+        {
+            "rank": rank,
+            "interview_id": r["id"],
+            "user_id": r["user_id"],
+            "name": r["username"],
+            "domain": r["domain"] or "General",
+            "final_percentage": r["final_percentage"],
+            "final_score": r["final_score"],
+            "recommendation": r["recommendation"],
+        }
+        for rank, r in enumerate(rows, start=1)
+    ]
+
+
+@router.get("/stats")
+def get_stats(user=Depends(verify_api_key)):
+    """Runtime performance counters for this worker process."""
+    if user["username"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+
+    return {
+        "llm": get_llm_stats(),
+        "llm_cache": get_cache_stats(),
+        "db_pool": get_pool_stats(),
+        "auth_cache": get_auth_cache_stats(),
+        "questions": get_inventory_totals(),
+        "speculation": get_speculation_stats(),
+        "jd_prompts": get_jd_prompt_stats(),
+        "prompts": get_prompt_stats(),
+        "resume_dedup": get_resume_dedup_stats(),
+        "pdf": get_pdf_stats(),
+    }
+
+
+@router.get("/question_inventory/{interview_id}")
+def get_question_inventory(interview_id: int, user=Depends(verify_api_key)):
+    """Generated / asked / wasted question counts for one interview."""
+    if user["username"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+
+    return get_inventory_stats(interview_id)
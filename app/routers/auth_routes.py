@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from app.utils.security import hash_password, generate_api_key, verify_password
 from app.database import get_db
+from app.services import candidate_summary
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -15,12 +16,13 @@ def signup(data: SignupRequest):
         try:
             hashed_pw = hash_password(data.password)
             api_key = generate_api_key()
-            db.execute(
+            user_id = db.execute(
                 "INSERT INTO users (username, password, api_key) VALUES (?, ?, ?)",
                 (data.username, hashed_pw, api_key)
-            )
+            ).lastrowid
         except Exception:
             raise HTTPException(status_code=400, detail="Username already exists")
+        candidate_summary.on_user_created(db, user_id, data.username)
     
     return {"api_key": api_key}
 
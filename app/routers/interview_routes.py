@@ -1,6 +1,12 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi.responses import FileResponse
 from app.utils.security import verify_api_key
-from app.services.resume_service import process_resume_upload
+from app.utils import blob_store
+from app.utils.uploads import spooled_upload
+from app.config import MAX_PDF_SIZE
+from app.database import get_db, run_db
+from app.services.resume_service import process_resume_upload_async
+from app.services.question_inventory import schedule_top_up
 
 router = APIRouter(prefix="/interviews", tags=["Interview"])
 
@@ -13,13 +19,47 @@ async def upload_resume(
     if not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF resumes allowed")
 
-    file_bytes = await file.read()
+    # Spooled by the multipart parser (disk beyond 1MB); never read whole into RAM
+    resume_file = spooled_upload(file, MAX_PDF_SIZE)
     try:
-        interview_id, resume_text = process_resume_upload(user["user_id"], file_bytes)
+        interview_id, resume_text = await process_resume_upload_async(user["user_id"], resume_file)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    # Start filling the question bank so Q1 is ready when the candidate asks
+    job_id = await run_db(schedule_top_up, interview_id)
+
     return {
         "message": "Resume uploaded and processed successfully",
-        "interview_id": interview_id
+        "interview_id": interview_id,
+        "question_job_id": job_id
     }
+
+
+def _get_resume_ref(interview_id: int):
+    with get_db() as db:
+        return db.execute(
+            "SELECT user_id, resume_hash FROM interviews WHERE id=?",
+            (interview_id,)
+        ).fetchone()
+
+
+@router.get("/{interview_id}/resume")
+async def download_resume(interview_id: int, user=Depends(verify_api_key)):
+    """Stream the uploaded resume PDF (owner or admin only)."""
+    row = await run_db(_get_resume_ref, interview_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    if row["user_id"] != user["user_id"] and user["username"] != "admin":
+        raise HTTPException(status_code=403, detail="Not your interview")
+
+    if not row["resume_hash"] or not blob_store.exists(row["resume_hash"]):
+        raise HTTPException(status_code=404, detail="Resume file not found")
+
+    # Sent in chunks straight from disk
+    return FileResponse(
+        blob_store.blob_path(row["resume_hash"]),
+        media_type="application/pdf",
+        filename=f"resume_{interview_id}.pdf",
+    )
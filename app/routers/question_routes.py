@@ -1,13 +1,24 @@
+import json
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from app.utils.security import verify_api_key
-from app.database import get_db
+from app.database import get_db, run_db
 from app.services.question_service import (
-    generate_consequential_questions,
-    generate_followup_question
+    generate_followup_question_async,
+    save_followup_question,
+    mark_question_asked,
+    get_interview_progress,
+    SpeculativeFollowup
 )
-from app.services.evaluation_service import evaluate_answer
-from app.services.report_service import generate_final_report
-from app.config import get_question_limits
+from app.services.question_inventory import ensure_stock_async, schedule_top_up
+from app.services.evaluation_service import (
+    evaluate_answer_async,
+    evaluate_turn_async,
+    stream_evaluation_async
+)
+from app.services.report_service import enqueue_report
+from app.services import candidate_summary
+from app.config import get_question_limits, TURN_MODE
 
 router = APIRouter(prefix="/questions", tags=["Questions"])
 
@@ -20,88 +31,78 @@ class AnswerInput(BaseModel):
     answer: str
 
 
-def get_question_counts(interview_id: int):
-    """Count total questions asked and split by type."""
-    with get_db() as db:
-        total_asked = db.execute("""
-            SELECT COUNT(*) AS cnt FROM questions
-            WHERE interview_id = ? AND asked = 1
-        """, (interview_id,)).fetchone()["cnt"]
-
-        conseq_asked = db.execute("""
-            SELECT COUNT(*) AS cnt FROM questions
-            WHERE interview_id = ? AND asked = 1 AND source_type='consequential'
-        """, (interview_id,)).fetchone()["cnt"]
-
-        follow_asked = db.execute("""
-            SELECT COUNT(*) AS cnt FROM questions
-            WHERE interview_id = ? AND asked = 1 AND source_type='followup'
-        """, (interview_id,)).fetchone()["cnt"]
-
-    return total_asked, conseq_asked, follow_asked
-
-
 def fetch_next_consequential(interview_id: int) -> tuple[int, str]:
     """Pull and mark the next unasked consequential question."""
     with get_db() as db:
-        row = db.execute("""
-            SELECT id, question_text
-            FROM questions
-            WHERE interview_id = ?
-              AND asked = 0
-              AND source_type = 'consequential'
-            ORDER BY id ASC
-            LIMIT 1
-        """, (interview_id,)).fetchone()
-
-    if not row:
-        raise ValueError("No more consequential questions available.")
+        while True:
+            row = db.execute("""
+                SELECT id, question_text
+                FROM questions
+                WHERE interview_id = ?
+                  AND asked = 0
+                  AND source_type = 'consequential'
+                ORDER BY id ASC
+                LIMIT 1
+            """, (interview_id,)).fetchone()
+
+            if not row:
+                raise ValueError("No more consequential questions available.")
+
+            # Mark as asked (retry if another request just took it)
+            if mark_question_asked(db, interview_id, row["id"], "consequential"):
+                return row["id"], row["question_text"]
+
+
+def _get_question_context(question_id: int):
+    with get_db() as db:
+        return db.execute("""
+            SELECT q.interview_id, q.question_text
+            FROM questions q
+            WHERE q.id = ?
+        """, (question_id,)).fetchone()
 
-    q_id = row["id"]
-    question_text = row["question_text"]
 
-    # Mark as asked
+def _mark_in_progress(interview_id: int):
+    """Update interview state on first valid answer."""
     with get_db() as db:
         db.execute(
-            "UPDATE questions SET asked = 1 WHERE id = ?",
-            (q_id,)
+            "UPDATE interviews SET status='IN_PROGRESS' "
+            "WHERE id=? AND status='GENERATING_QUESTIONS'",
+            (interview_id,)
         )
-
-    return q_id, question_text
+        candidate_summary.refresh(db, interview_id)
 
 
-@router.post("/{question_id}/answer")
-def submit_answer(
-    question_id: int,
-    data: AnswerInput,  # receives JSON body: {"answer": "..."}
-    user=Depends(verify_api_key)
-):
-    answer = data.answer.strip()
-    if not answer:
-        raise HTTPException(status_code=400, detail="Answer cannot be empty")
-
-    # Lookup question & interview context
+def _mark_completed(interview_id: int):
     with get_db() as db:
-        row = db.execute("""
-            SELECT q.interview_id, q.question_text
-            FROM questions q
-            WHERE q.id = ?
-        """, (question_id,)).fetchone()
+        db.execute(
+            "UPDATE interviews SET status='COMPLETED' WHERE id=?",
+            (interview_id,)
+        )
+        candidate_summary.refresh(db, interview_id)
 
-    if not row:
-        raise HTTPException(status_code=404, detail="Question not found")
 
-    interview_id = row["interview_id"]
-    question_text = row["question_text"]
+def _followup_possible(interview_id: int) -> bool:
+    """
+    Whether a valid answer to the current question can be followed by a
+    follow-up (the check _advance_interview makes, one answer ahead).
+    """
+    answered, _, follow_count = get_interview_progress(interview_id)
+    TOTAL_QUESTIONS, _, FOLLOWUP_MAX = get_question_limits()
 
-    # Evaluate
-    result = evaluate_answer(
-        question_text,
-        answer,
-        interview_id,
-        question_id
+    answered += 1
+    return (
+        answered < TOTAL_QUESTIONS
+        and follow_count < answered
+        and follow_count < FOLLOWUP_MAX
     )
 
+
+async def _advance_interview(interview_id: int, result: dict, speculative: SpeculativeFollowup = None) -> dict:
+    """
+    Everything after an answer has been evaluated: retry handling,
+    completion + report, or picking the next question.
+    """
     # Retry mechanism
     if result.get("retry_required", False):
         return {
@@ -110,67 +111,42 @@ def submit_answer(
             "feedback": result.get("reject_reason", "")
         }
 
-    # Update interview state on first valid answer
-    with get_db() as db:
-        db.execute(
-            "UPDATE interviews SET status='IN_PROGRESS' "
-            "WHERE id=? AND status='GENERATING_QUESTIONS'",
-            (interview_id,)
-        )
+    await run_db(_mark_in_progress, interview_id)
+    answered, conseq_count, follow_count = await run_db(get_interview_progress, interview_id)
 
-    # Count how many answers scored for this interview
-    with get_db() as db:
-        answered = db.execute("""
-            SELECT COUNT(*) AS cnt
-            FROM answers
-            WHERE score IS NOT NULL
-              AND question_id IN (SELECT id FROM questions WHERE interview_id=?)
-        """, (interview_id,)).fetchone()["cnt"]
-
-    # Get dynamic limits
-    TOTAL_QUESTIONS, _, FOLLOWUP_MAX = get_question_limits()
+    # Get dynamic limits (cached snapshot; may run a version probe, so off the loop)
+    TOTAL_QUESTIONS, _, FOLLOWUP_MAX = await run_db(get_question_limits)
 
     # End of interview?
     if answered >= TOTAL_QUESTIONS:
-        with get_db() as db:
-            db.execute(
-                "UPDATE interviews SET status='COMPLETED' WHERE id=?",
-                (interview_id,)
-            )
-        
-        # Trigger report generation
-        try:
-            generate_final_report(interview_id)
-        except Exception as e:
-            print(f"Error generating report: {e}")
+        await run_db(_mark_completed, interview_id)
+
+        # Report is generated in the background; poll /report/{id}
+        job_id = await run_db(enqueue_report, interview_id)
 
         return {
             "message": "Interview completed. Fetch final report.",
-            "done": True
+            "done": True,
+            "report_job_id": job_id
         }
 
-    # Counts for next question logic
-    with get_db() as db:
-        conseq_count = db.execute("""
-            SELECT COUNT(*) AS cnt
-            FROM questions
-            WHERE interview_id=? AND asked=1 AND source_type='consequential'
-        """, (interview_id,)).fetchone()["cnt"]
-
-        follow_count = db.execute("""
-            SELECT COUNT(*) AS cnt
-            FROM questions
-            WHERE interview_id=? AND asked=1 AND source_type='followup'
-        """, (interview_id,)).fetchone()["cnt"]
-
     # Pick next Q
     if follow_count < answered and follow_count < FOLLOWUP_MAX:
-        next_q = generate_followup_question(interview_id)
-        q_id = None  # Not stored here; service handles marking
+        if result.get("next_followup"):
+            next_q = result["next_followup"]
+            q_id = await run_db(save_followup_question, interview_id, next_q, True)
+        elif speculative:
+            q_id, next_q = await speculative.commit()
+        else:
+            q_id, next_q = await generate_followup_question_async(interview_id, mark_asked=True)
     else:
-        # Ensure supply before fetching
-        generate_consequential_questions(interview_id)
-        q_id, next_q = fetch_next_consequential(interview_id)
+        # Only generates when the unasked stock is empty
+        await ensure_stock_async(interview_id)
+        try:
+            q_id, next_q = await run_db(fetch_next_consequential, interview_id)
+        except ValueError:
+            raise HTTPException(status_code=404, detail="No more questions available")
+        await run_db(schedule_top_up, interview_id)
 
     return {
         "message": "Answer evaluated",
@@ -182,6 +158,108 @@ def submit_answer(
     }
 
 
+@router.post("/{question_id}/answer")
+async def submit_answer(
+    question_id: int,
+    data: AnswerInput,  # receives JSON body: {"answer": "..."}
+    user=Depends(verify_api_key)
+):
+    answer = data.answer.strip()
+    if not answer:
+        raise HTTPException(status_code=400, detail="Answer cannot be empty")
+
+    # Lookup question & interview context
+    row = await run_db(_get_question_context, question_id)
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Question not found")
+
+    interview_id = row["interview_id"]
+    question_text = row["question_text"]
+
+    # Speculative mode drafts the follow-up while the answer is evaluated,
+    # but only when the answer can actually lead to one
+    speculative = None
+    if TURN_MODE == "speculative" and await run_db(_followup_possible, interview_id):
+        speculative = SpeculativeFollowup(interview_id, question_text, answer)
+
+    try:
+        # Evaluate (single-shot mode also drafts the next follow-up)
+        evaluate = evaluate_turn_async if TURN_MODE == "single_shot" else evaluate_answer_async
+        result = await evaluate(
+            question_text,
+            answer,
+            interview_id,
+            question_id
+        )
+
+        return await _advance_interview(interview_id, result, speculative)
+    finally:
+        # No-op if the draft was committed
+        if speculative:
+            speculative.discard()
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/{question_id}/answer/stream")
+async def submit_answer_stream(
+    question_id: int,
+    data: AnswerInput,
+    user=Depends(verify_api_key)
+):
+    """
+    Streaming variant of submit_answer over Server-Sent Events:
+      event: score     {"score": n}          as soon as it parses
+      event: feedback  {"delta": "..."}      while feedback streams
+      event: result    same body as POST /{question_id}/answer
+      event: error     {"detail": "..."}     if anything fails mid-stream
+    """
+    answer = data.answer.strip()
+    if not answer:
+        raise HTTPException(status_code=400, detail="Answer cannot be empty")
+
+    row = await run_db(_get_question_context, question_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Question not found")
+
+    interview_id = row["interview_id"]
+    question_text = row["question_text"]
+
+    async def events():
+        speculative = None
+        if TURN_MODE == "speculative" and await run_db(_followup_possible, interview_id):
+            speculative = SpeculativeFollowup(interview_id, question_text, answer)
+
+        try:
+            result = None
+            async for kind, value in stream_evaluation_async(
+                question_text, answer, interview_id, question_id
+            ):
+                if kind == "score":
+                    yield _sse("score", {"score": value})
+                elif kind == "feedback":
+                    yield _sse("feedback", {"delta": value})
+                else:
+                    result = value
+
+            yield _sse("result", await _advance_interview(interview_id, result, speculative))
+        except Exception as e:
+            print(f"Streaming answer failed: {e}")
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            if speculative:
+                speculative.discard()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/config")
 def get_public_question_config(user=Depends(verify_api_key)):
     """Return the configured number of questions (for frontend progress bar)."""
@@ -193,53 +271,58 @@ def get_public_question_config(user=Depends(verify_api_key)):
     }
 
 
+def _interview_done(interview_id: int) -> bool:
+    """True once the interview has all its answers."""
+    answered, _, _ = get_interview_progress(interview_id)
+
+    # Get dynamic limits
+    TOTAL_QUESTIONS, _, _ = get_question_limits()
+
+    return answered >= TOTAL_QUESTIONS
+
+
+def _take_next_unasked(interview_id: int):
+    """Fetch the next unasked question and mark it asked."""
+    with get_db() as db:
+        while True:
+            row = db.execute("""
+                SELECT id, question_text, source_type
+                FROM questions
+                WHERE interview_id=? AND asked=0
+                ORDER BY id ASC LIMIT 1
+            """, (interview_id,)).fetchone()
+
+            if not row:
+                return None
+
+            # Mark question asked (retry if another request just took it)
+            if mark_question_asked(db, interview_id, row["id"], row["source_type"]):
+                return row["id"], row["question_text"]
+
+
 @router.get("/next/{interview_id}")
-def get_next_question(interview_id: int, user=Depends(verify_api_key)):
+async def get_next_question(interview_id: int, user=Depends(verify_api_key)):
     """Fetch the next unasked question. Generate if needed."""
 
-    with get_db() as db:
-        # Count asked questions
-        answered = db.execute("""
-            SELECT COUNT(*) AS cnt FROM answers
-            WHERE question_id IN (
-                SELECT id FROM questions WHERE interview_id=?
-            ) AND score IS NOT NULL
-        """, (interview_id,)).fetchone()["cnt"]
-
-        # Get dynamic limits
-        TOTAL_QUESTIONS, CONSEQUENTIAL_MAX, _ = get_question_limits()
-
-        # Is interview complete?
-        if answered >= TOTAL_QUESTIONS:
-            return {"done": True, "message": "Interview already completed"}
-
-        # Count consequential asked
-        conseq_asked = db.execute("""
-            SELECT COUNT(*) AS cnt FROM questions
-            WHERE interview_id=? AND asked=1 AND source_type='consequential'
-        """, (interview_id,)).fetchone()["cnt"]
-
-    # Pre-generate consequential if needed
-    if conseq_asked < CONSEQUENTIAL_MAX:
-        generate_consequential_questions(interview_id)
-
-    # Fetch next unasked question
-    with get_db() as db:
-        row = db.execute("""
-            SELECT id, question_text, source_type
-            FROM questions
-            WHERE interview_id=? AND asked=0
-            ORDER BY id ASC LIMIT 1
-        """, (interview_id,)).fetchone()
-
-        if not row:
-            raise HTTPException(status_code=404, detail="No more questions available")
+    if await run_db(_interview_done, interview_id):
+        return {"done": True, "message": "Interview already completed"}
+
+    # Fast path: question bank already filled by the pre-generation job
+    nxt = await run_db(_take_next_unasked, interview_id)
+
+    # Bank still empty: wait for a pending job, else generate inline
+    # (a no-op once the interview needs no more consequential questions)
+    if not nxt:
+        await ensure_stock_async(interview_id)
+        nxt = await run_db(_take_next_unasked, interview_id)
+
+    if not nxt:
+        raise HTTPException(status_code=404, detail="No more questions available")
 
-        q_id = row["id"]
-        q_text = row["question_text"]
+    # Refill in the background once stock falls below the low-water mark
+    await run_db(schedule_top_up, interview_id)
 
-        # Mark question asked
-        db.execute("UPDATE questions SET asked=1 WHERE id=?", (q_id,))
+    q_id, q_text = nxt
 
     return {
         "question_id": q_id,
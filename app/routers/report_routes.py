@@ -1,33 +1,92 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, ORJSONResponse
 from app.utils.security import verify_api_key
-from app.services.report_service import generate_final_report
-from app.database import get_db
+from app.services.report_service import enqueue_report, get_report_job
+from app.database import get_db, run_db
 import json
 
 router = APIRouter(prefix="/report", tags=["Report"])
 
 
-@router.get("/{interview_id}")
-def get_final_report(interview_id: int, user=Depends(verify_api_key)):
+def _get_report_state(interview_id: int):
+    with get_db() as db:
+        return db.execute(
+            "SELECT status, report_etag, final_report IS NOT NULL AS has_report "
+            "FROM interviews WHERE id=?",
+            (interview_id,),
+        ).fetchone()
+
 
-    # Ensure interview exists and check for stored report
+def _get_report_json(interview_id: int):
     with get_db() as db:
         row = db.execute(
-            "SELECT status, final_report FROM interviews WHERE id=?",
+            "SELECT final_report FROM interviews WHERE id=?",
             (interview_id,),
         ).fetchone()
+    return row["final_report"] if row else None
+
+
+def _pending_response(interview_id: int, regenerate: bool = False) -> JSONResponse:
+    """
+    202 with the state of the (possibly just enqueued) report job.
+    regenerate=True enqueues whatever the last job did (the stored report
+    is unusable); an already active job is reused.
+    """
+    job = get_report_job(interview_id)
+    if regenerate or not job or job["status"] == "failed":
+        enqueue_report(interview_id)
+        job = get_report_job(interview_id)
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "message": "Report is being generated. Poll again shortly.",
+            "job_id": job["id"],
+            "status": job["status"],
+            "progress": job["progress"],
+        },
+    )
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    etag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+@router.get("/{interview_id}", response_class=ORJSONResponse)
+async def get_final_report(interview_id: int, request: Request, user=Depends(verify_api_key)):
+
+    # Ensure interview exists and check for stored report (without loading it)
+    row = await run_db(_get_report_state, interview_id)
 
     if not row:
         raise HTTPException(status_code=404, detail="Interview not found")
 
+    # Stored report with a known hash: revalidate, or send the stored bytes as-is.
+    # Weak, since the same report may go out gzip-encoded or not.
+    if row["report_etag"]:
+        etag = f'W/"{row["report_etag"]}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+        report_json = await run_db(_get_report_json, interview_id)
+        return Response(content=report_json, media_type="application/json", headers=headers)
+
     # If report already stored, just return it
-    if row["final_report"]:
+    if row["has_report"]:
         try:
-            return json.loads(row["final_report"])
+            return json.loads(await run_db(_get_report_json, interview_id))
         except Exception:
             # Fallback: regenerate if stored JSON is somehow corrupt
-            report = generate_final_report(interview_id)
-            return report.model_dump()
+            return await run_db(_pending_response, interview_id, True)
 
     # If no stored report yet, only allow if interview was completed
     if row["status"] not in ("COMPLETED", "REPORTED"):
@@ -36,6 +95,5 @@ def get_final_report(interview_id: int, user=Depends(verify_api_key)):
             detail=f"Interview not ready for reporting. Current state: {row['status']}",
         )
 
-    # Generate, save (inside service), and return
-    report = generate_final_report(interview_id)
-    return report.model_dump()
+    # Generated in the background (duplicate requests collapse onto one job)
+    return await run_db(_pending_response, interview_id)
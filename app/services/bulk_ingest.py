@@ -0,0 +1,276 @@
+"""
+Admin bulk resume ingestion.
+
+The upload request only validates files, stores the PDFs in the blob
+store and records one job_items row per file; a background job
+(kind "bulk_ingest") then extracts and analyzes them with bounded
+concurrency and writes interviews in batched transactions.
+"""
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tempfile import SpooledTemporaryFile
+
+from app.config import (
+    MAX_PDF_SIZE,
+    BULK_MAX_FILES,
+    BULK_PDF_CONCURRENCY,
+    BULK_LLM_CONCURRENCY,
+    BULK_INSERT_BATCH,
+    BULK_JOB_WORKERS,
+)
+from app.database import get_db
+from app.services import job_queue
+from app.services.resume_service import (
+    analyze_resume,
+    insert_interview,
+    lookup_fingerprint,
+    resume_fingerprint,
+)
+from app.utils import blob_store
+from app.utils.pdf2text import extract_text_from_pdf
+
+BULK_JOB = "bulk_ingest"
+
+_CHUNK_SIZE = 64 * 1024
+
+# Shared by all bulk jobs in this process: PDF parsing (CPU) and resume
+# analysis (LLM) are limited separately so neither starves the other
+_pdf_slots = threading.BoundedSemaphore(BULK_PDF_CONCURRENCY)
+_llm_slots = threading.BoundedSemaphore(BULK_LLM_CONCURRENCY)
+
+# A bulk job holds its thread for the whole batch, so bulk jobs get their
+# own pool instead of starving report and question jobs on the shared one
+_bulk_executor = ThreadPoolExecutor(max_workers=BULK_JOB_WORKERS, thread_name_prefix="bulk-job")
+
+
+def _spool(stream, limit: int):
+    """Copy a stream into a spooled file in chunks; None if it exceeds `limit`."""
+    out = SpooledTemporaryFile(max_size=1024 * 1024)
+    size = 0
+    for chunk in iter(lambda: stream.read(_CHUNK_SIZE), b""):
+        size += len(chunk)
+        if size > limit:
+            out.close()
+            return None
+        out.write(chunk)
+    out.seek(0)
+    return out
+
+
+def iter_pdfs(filename: str, fileobj):
+    """
+    Yield (filename, pdf_file_or_None, error) for an uploaded PDF or for
+    every PDF inside an uploaded ZIP (in archive order).
+    """
+    if filename.lower().endswith(".pdf"):
+        fileobj.seek(0, 2)
+        if fileobj.tell() > MAX_PDF_SIZE:
+            yield filename, None, "PDF exceeds 3MB limit"
+        else:
+            fileobj.seek(0)
+            yield filename, fileobj, None
+        return
+
+    if not filename.lower().endswith(".zip"):
+        yield filename, None, "Only PDF or ZIP files allowed"
+        return
+
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        yield filename, None, "Invalid ZIP archive"
+        return
+
+    with archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith("__MACOSX/"):
+                continue
+            if not name.lower().endswith(".pdf"):
+                yield name, None, "Only PDF files allowed"
+                continue
+            # Declared size can lie; _spool enforces the limit on real bytes
+            if info.file_size > MAX_PDF_SIZE:
+                yield name, None, "PDF exceeds 3MB limit"
+                continue
+            with archive.open(info) as member:
+                pdf = _spool(member, MAX_PDF_SIZE)
+            if pdf is None:
+                yield name, None, "PDF exceeds 3MB limit"
+                continue
+            with pdf:
+                yield name, pdf, None
+
+
+def _resolve_users(usernames: list) -> dict:
+    if not usernames:
+        return {}
+    with get_db() as db:
+        rows = db.execute(
+            f"SELECT id, username FROM users WHERE username IN ({','.join('?' * len(usernames))})",
+            usernames
+        ).fetchall()
+    return {r["username"]: r["id"] for r in rows}
+
+
+def _default_username(filename: str) -> str:
+    return filename.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+
+
+def _scan(uploads: list):
+    """iter_pdfs() over every upload, rewinding each so it can be scanned again."""
+    for filename, fileobj in uploads:
+        fileobj.seek(0)
+        yield from iter_pdfs(filename, fileobj)
+
+
+def create_bulk_job(uploads: list, usernames: list = None) -> dict:
+    """
+    Validate and store the uploaded PDFs, record a job item per file and
+    start the ingest job. `uploads` is a list of (filename, file object);
+    `usernames` maps to the accepted PDFs in order, otherwise each PDF's
+    file name (without .pdf) is taken as the candidate's username.
+
+    Everything is validated in a first pass; blobs are only written in a
+    second pass, so a rejected upload leaves nothing in the blob store.
+    """
+    items = []
+    for name, _, error in _scan(uploads):
+        if len(items) >= BULK_MAX_FILES:
+            raise ValueError(f"At most {BULK_MAX_FILES} resumes per bulk upload")
+        items.append({"filename": name, "resume_hash": None, "error": error})
+
+    if not items:
+        raise ValueError("No resumes found in upload")
+
+    pdf_count = sum(1 for item in items if not item["error"])
+    if usernames and len(usernames) != pdf_count:
+        raise ValueError(f"Got {len(usernames)} usernames for {pdf_count} PDFs")
+
+    given = iter(usernames or [])
+    for item in items:
+        if usernames and not item["error"]:
+            item["username"] = next(given)
+        else:
+            item["username"] = _default_username(item["filename"])
+
+    user_ids = _resolve_users(sorted({item["username"] for item in items}))
+    for item in items:
+        item["user_id"] = user_ids.get(item["username"])
+        if item["user_id"] is None and not item["error"]:
+            item["error"] = f"Unknown user: {item['username']}"
+
+    # Second pass yields the same files in the same order
+    for item, (_, pdf, _) in zip(items, _scan(uploads)):
+        if not item["error"]:
+            item["resume_hash"] = resume_fingerprint(pdf)
+            blob_store.put_file(pdf, item["resume_hash"])
+
+    job_id, _ = job_queue.create_job(BULK_JOB)
+    with get_db() as db:
+        db.executemany("""
+            INSERT INTO job_items (job_id, position, filename, username, user_id, resume_hash, status, error)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (job_id, i, item["filename"], item["username"], item["user_id"], item["resume_hash"],
+             "failed" if item["error"] else "queued", item["error"])
+            for i, item in enumerate(items)
+        ])
+    job_queue.start_job(job_id, run_bulk_ingest, job_id, executor=_bulk_executor)
+
+    accepted = sum(1 for item in items if not item["error"])
+    return {"job_id": job_id, "files": len(items), "accepted": accepted, "rejected": len(items) - accepted}
+
+
+def _prepare(item) -> tuple:
+    """(resume_text, candidate_profile) for one job item; runs on a pool thread."""
+    known = lookup_fingerprint(item["resume_hash"])
+    if known:
+        return known
+
+    with _pdf_slots:
+        with open(blob_store.blob_path(item["resume_hash"]), "rb") as f:
+            resume_text = extract_text_from_pdf(f)
+    if not resume_text:
+        raise ValueError("Failed to read PDF text. Ensure it's text-based.")
+
+    with _llm_slots:
+        return resume_text, analyze_resume(resume_text)
+
+
+def _flush(results: list):
+    """Write a batch of finished items (and their interviews) in one transaction."""
+    with get_db() as db:
+        for item, outcome, error in results:
+            interview_id = None
+            if outcome:
+                resume_text, profile = outcome
+                interview_id = insert_interview(
+                    db, item["user_id"], item["resume_hash"], resume_text, profile
+                )
+            db.execute(
+                "UPDATE job_items SET status=?, interview_id=?, error=?, "
+                "updated_at=CURRENT_TIMESTAMP WHERE id=?",
+                ("done" if outcome else "failed", interview_id, error, item["id"])
+            )
+
+
+def run_bulk_ingest(job_id: int):
+    """Job body: process every queued item of a bulk job."""
+    with get_db() as db:
+        items = [dict(r) for r in db.execute(
+            "SELECT id, user_id, resume_hash FROM job_items "
+            "WHERE job_id=? AND status='queued' ORDER BY position",
+            (job_id,)
+        ).fetchall()]
+
+    total, finished, pending = len(items), 0, []
+    with ThreadPoolExecutor(
+        max_workers=BULK_PDF_CONCURRENCY + BULK_LLM_CONCURRENCY,
+        thread_name_prefix=f"bulk{job_id}",
+    ) as pool:
+        futures = {pool.submit(_prepare, item): item for item in items}
+        for future in as_completed(futures):
+            try:
+                pending.append((futures[future], future.result(), None))
+            except Exception as e:
+                pending.append((futures[future], None, str(e)))
+
+            if len(pending) >= BULK_INSERT_BATCH:
+                _flush(pending)
+                finished += len(pending)
+                pending = []
+
+            # Per item, so updated_at keeps moving and the stale sweep
+            # in create_job never mistakes a long batch for a dead job
+            job_queue.report_progress((finished + len(pending)) / total)
+
+    if pending:
+        _flush(pending)
+
+
+def get_bulk_job(job_id: int):
+    """Job row plus per-file items, or None if `job_id` is not a bulk job."""
+    job = job_queue.get_job(job_id)
+    if not job or job["kind"] != BULK_JOB:
+        return None
+
+    with get_db() as db:
+        items = db.execute("""
+            SELECT position, filename, username, status, interview_id, error
+            FROM job_items WHERE job_id=? ORDER BY position
+        """, (job_id,)).fetchall()
+
+    counts = {"queued": 0, "done": 0, "failed": 0}
+    for item in items:
+        counts[item["status"]] += 1
+
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "progress": job["progress"],
+        "error": job["error"],
+        "counts": counts,
+        "items": [dict(item) for item in items],
+    }
@@ -0,0 +1,124 @@
+"""
+candidate_summary: one row per candidate (non-admin user) with their
+latest interview's status, average score, final percentage and domain.
+Maintained in the same transactions that change those values, so the
+admin listing never aggregates answers or scans interviews.
+"""
+import base64
+import json
+
+from app.database import get_db
+from app.migrations import REBUILD_CANDIDATE_SUMMARY
+
+SORT_COLUMNS = {"recent": "latest_at", "score": "score"}
+
+
+def on_user_created(db, user_id: int, username: str):
+    if username == "admin":
+        return
+    db.execute(
+        "INSERT OR IGNORE INTO candidate_summary (user_id, username) VALUES (?, ?)",
+        (user_id, username)
+    )
+
+
+def on_interview_created(db, interview_id: int):
+    """A new interview becomes its candidate's latest one."""
+    db.execute("""
+        INSERT INTO candidate_summary (user_id, username, interview_id, status, domain, latest_at)
+        SELECT i.user_id, u.username, i.id, i.status, i.domain, i.created_at
+        FROM interviews i
+        JOIN users u ON u.id = i.user_id
+        WHERE i.id = ? AND u.username != 'admin'
+        ON CONFLICT(user_id) DO UPDATE SET
+            interview_id = excluded.interview_id,
+            status = excluded.status,
+            score = 0,
+            final_percentage = NULL,
+            domain = excluded.domain,
+            latest_at = excluded.latest_at,
+            updated_at = CURRENT_TIMESTAMP
+    """, (interview_id,))
+
+
+def refresh(db, interview_id: int):
+    """
+    Recompute status, average score and final percentage for an
+    interview (no-op unless it is its candidate's latest).
+    """
+    db.execute("""
+        UPDATE candidate_summary SET
+            status = (SELECT status FROM interviews WHERE id = :iid),
+            score = COALESCE((
+                SELECT AVG(a.score)
+                FROM answers a
+                JOIN questions q ON a.question_id = q.id
+                WHERE q.interview_id = :iid AND a.score IS NOT NULL
+            ), 0),
+            final_percentage = (SELECT final_percentage FROM interviews WHERE id = :iid),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE interview_id = :iid
+    """, {"iid": interview_id})
+
+
+def rebuild(db):
+    """Recompute every row from users/interviews/answers."""
+    db.execute("DELETE FROM candidate_summary")
+    db.execute(REBUILD_CANDIDATE_SUMMARY)
+
+
+def encode_cursor(sort_value, user_id: int) -> str:
+    raw = json.dumps([sort_value, user_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, user_id = json.loads(base64.urlsafe_b64decode(padded))
+        return sort_value, int(user_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def list_candidates(limit: int, sort: str = "recent", order: str = "desc", status: str = None,
+                    min_score: float = None, max_score: float = None, cursor: str = None):
+    """
+    One page of candidates, keyset-paginated on (sort column, user_id).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_COLUMNS)}")
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be asc or desc")
+
+    column = SORT_COLUMNS[sort]
+    where, params = [], []
+    if status:
+        where.append("status = ?")
+        params.append(status)
+    if min_score is not None:
+        where.append("score >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        where.append("score <= ?")
+        params.append(max_score)
+    if cursor:
+        where.append(f"({column}, user_id) {'<' if order == 'desc' else '>'} (?, ?)")
+        params.extend(decode_cursor(cursor))
+
+    with get_db() as db:
+        rows = db.execute(f"""
+            SELECT user_id, username, interview_id, status, score, final_percentage, domain, latest_at
+            FROM candidate_summary
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY {column} {order.upper()}, user_id {order.upper()}
+            LIMIT ?
+        """, (*params, limit + 1)).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[column], last["user_id"])
+    return rows, next_cursor
@@ -1,40 +1,33 @@
 import json
-from openai import OpenAI
-from app.config import OPENAI_API_KEY
-from app.database import get_db
-
-def get_openai_client():
-    return OpenAI(api_key=OPENAI_API_KEY)
+import re
+from app.database import get_db, run_db
+from app.services import llm_gateway, candidate_summary
+from app.services.prompt_builder import build_messages
+from app.services.jd_service import get_prompt_job_description
 
 
 def get_profile_and_jd(interview_id: int):
-    """Fetch resume-derived profile + JD text."""
+    """Fetch resume-derived profile + JD text for prompts."""
     with get_db() as db:
         profile_row = db.execute(
             "SELECT candidate_profile FROM interviews WHERE id=?",
             (interview_id,)
         ).fetchone()
 
-        jd_row = db.execute(
-            "SELECT content FROM job_description"
-        ).fetchone()
-
     profile = json.loads(profile_row["candidate_profile"]) if profile_row else {}
-    jd = jd_row["content"] if jd_row else ""
+    jd = get_prompt_job_description()
 
     return profile, jd
 
 
-def evaluate_answer(question: str, answer: str, interview_id: int, question_id: int):
-    """
-    Evaluate answer quality using strict elite filters.
-    Handles:
-      - Vagueness detection
-      - Hard scoring
-      - Per-skill confidence scoring
-    """
-    profile, jd = get_profile_and_jd(interview_id)
+def _evaluation_messages(question: str, answer: str, profile: dict, jd: str) -> list:
+    return build_messages(
+        _render_evaluation,
+        question=question, answer=answer, profile=json.dumps(profile), jd=jd
+    )
 
+
+def _render_evaluation(question: str, answer: str, profile: str, jd: str) -> list:
     prompt = f"""
 Evaluate the candidate's answer based strictly on elite top-5% interview standards.
 
@@ -45,7 +38,7 @@ Candidate Answer:
 {answer}
 
 Candidate Profile:
-{json.dumps(profile)}
+{profile}
 
 Job Description:
 {jd}
@@ -68,14 +61,26 @@ Rules:
 - Reward specific, correct, practical reasoning
 - No markdown allowed
 """
+    return [
+        {"role": "system", "content": "Return JSON only! No markdown."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def evaluate_answer(question: str, answer: str, interview_id: int, question_id: int):
+    """
+    Evaluate answer quality using strict elite filters.
+    Handles:
+      - Vagueness detection
+      - Hard scoring
+      - Per-skill confidence scoring
+    """
+    profile, jd = get_profile_and_jd(interview_id)
 
-    response = get_openai_client().chat.completions.create(
-        model="gpt-4o",
+    response = llm_gateway.chat(
+        _evaluation_messages(question, answer, profile, jd),
         temperature=0.2,
-        messages=[
-            {"role": "system", "content": "Return JSON only! No markdown."},
-            {"role": "user", "content": prompt}
-        ]
+        purpose="evaluation",
     )
 
     result = json.loads(response.choices[0].message.content)
@@ -84,6 +89,216 @@ Rules:
     return result
 
 
+async def evaluate_answer_async(question: str, answer: str, interview_id: int, question_id: int):
+    """Non-blocking evaluate_answer() for async routes."""
+    profile, jd = await run_db(get_profile_and_jd, interview_id)
+
+    response = await llm_gateway.achat(
+        _evaluation_messages(question, answer, profile, jd),
+        temperature=0.2,
+        purpose="evaluation",
+    )
+
+    result = json.loads(response.choices[0].message.content)
+    await run_db(_store_evaluation, interview_id, question_id, answer, result)
+
+    return result
+
+
+def _partial_string_field(buf: str, field: str):
+    """
+    Decode as much of a (possibly unterminated) JSON string field as has
+    arrived so far. Returns (text, complete) or (None, False) if the field
+    has not started yet.
+    """
+    m = re.search(r'"%s"\s*:\s*"' % field, buf)
+    if not m:
+        return None, False
+
+    escaped = False
+    for i in range(m.end(), len(buf)):
+        ch = buf[i]
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == '"':
+            return json.loads(buf[m.end() - 1:i + 1]), True
+
+    # Unterminated: drop a trailing partial escape sequence and decode the rest
+    raw = buf[m.end():]
+    for cut in range(0, 7):
+        try:
+            return json.loads('"' + raw[:len(raw) - cut] + '"'), False
+        except ValueError:
+            continue
+    return "", False
+
+
+async def stream_evaluation_async(question: str, answer: str, interview_id: int, question_id: int):
+    """
+    Streaming evaluate_answer(): yields ("score", int) as soon as the score
+    parses, ("feedback", delta) while feedback text arrives, and finally
+    ("result", result) once the evaluation is stored.
+    """
+    profile, jd = await run_db(get_profile_and_jd, interview_id)
+
+    buf = ""
+    score_sent = False
+    feedback_sent = ""
+
+    async for delta in llm_gateway.astream(
+        _evaluation_messages(question, answer, profile, jd),
+        temperature=0.2,
+        purpose="evaluation_stream",
+    ):
+        buf += delta
+
+        if not score_sent:
+            m = re.search(r'"score"\s*:\s*(\d+)\s*[,}]', buf)
+            if m:
+                score_sent = True
+                yield "score", int(m.group(1))
+
+        feedback, _ = _partial_string_field(buf, "feedback")
+        if feedback and len(feedback) > len(feedback_sent):
+            yield "feedback", feedback[len(feedback_sent):]
+            feedback_sent = feedback
+
+    result = json.loads(buf)
+    await run_db(_store_evaluation, interview_id, question_id, answer, result)
+
+    yield "result", result
+
+
+_TURN_SCHEMA = {
+    "name": "turn_evaluation",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "score": {"type": "integer"},
+            "is_vague": {"type": "boolean"},
+            "skill_confidence": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "skill": {"type": "string"},
+                        "confidence": {"type": "integer"},
+                    },
+                    "required": ["skill", "confidence"],
+                    "additionalProperties": False,
+                },
+            },
+            "feedback": {"type": "string"},
+            "reject_reason": {"type": "string"},
+            "next_followup": {"type": "string"},
+        },
+        "required": [
+            "score", "is_vague", "skill_confidence",
+            "feedback", "reject_reason", "next_followup",
+        ],
+        "additionalProperties": False,
+    },
+}
+
+
+def _turn_messages(question: str, answer: str, profile: dict, jd: str) -> list:
+    return build_messages(
+        _render_turn,
+        question=question, answer=answer, profile=json.dumps(profile), jd=jd
+    )
+
+
+def _render_turn(question: str, answer: str, profile: str, jd: str) -> list:
+    prompt = f"""
+Evaluate the candidate's answer based strictly on elite top-5% interview standards,
+then write the next follow-up question for this candidate.
+
+Question:
+{question}
+
+Candidate Answer:
+{answer}
+
+Candidate Profile:
+{profile}
+
+Job Description:
+{jd}
+
+Fields:
+- score: integer 1-5
+- is_vague: true|false
+- skill_confidence: list of {{"skill": name, "confidence": int 1-100}}
+- feedback: medium-length constructive explanation
+- reject_reason: if vague, explain what lacks, else empty string
+- next_followup: ONE new question building on the answer above
+
+Evaluation rules:
+- If vague → score must be 1 and is_vague=true with a clear reject_reason
+- Penalize theoretical/cliché/no-tradeoff answers
+- Reward specific, correct, practical reasoning
+
+Follow-up rules:
+- The new question must escalate difficulty significantly
+- It must integrate multiple advanced skills
+- Require design-level reasoning and tradeoffs
+"""
+    return [
+        {"role": "system", "content": "Return JSON only! No markdown."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _parse_turn(raw: str) -> dict:
+    """Validate the combined response and normalise it to evaluate_answer()'s shape."""
+    data = json.loads(raw)
+
+    score = data["score"]
+    followup = data["next_followup"].strip()
+    if not isinstance(score, int) or not 1 <= score <= 5 or not followup:
+        raise ValueError(f"Unusable turn evaluation: {raw[:100]}")
+
+    return {
+        "score": score,
+        "is_vague": bool(data["is_vague"]),
+        "skill_confidence": {
+            s["skill"]: s["confidence"] for s in data["skill_confidence"]
+        },
+        "feedback": data["feedback"],
+        "reject_reason": data["reject_reason"],
+        "next_followup": followup,
+    }
+
+
+async def evaluate_turn_async(question: str, answer: str, interview_id: int, question_id: int):
+    """
+    Single-shot turn: one structured call returns the evaluation and the
+    next follow-up question ("next_followup"). Falls back to the regular
+    evaluate_answer_async() path (no "next_followup") if the call or its
+    parsing fails.
+    """
+    profile, jd = await run_db(get_profile_and_jd, interview_id)
+
+    try:
+        response = await llm_gateway.achat(
+            _turn_messages(question, answer, profile, jd),
+            temperature=0.2,
+            purpose="evaluation_turn",
+            response_format={"type": "json_schema", "json_schema": _TURN_SCHEMA},
+        )
+        result = _parse_turn(response.choices[0].message.content)
+    except Exception as e:
+        print(f"⚠️ Single-shot turn failed, falling back to two calls: {e}")
+        return await evaluate_answer_async(question, answer, interview_id, question_id)
+
+    await run_db(_store_evaluation, interview_id, question_id, answer, result)
+
+    return result
+
+
 def _store_evaluation(interview_id: int, question_id: int, answer: str, result: dict):
     """
     Persist scoring + retry logic + skill confidence.
@@ -93,9 +308,13 @@ def _store_evaluation(interview_id: int, question_id: int, answer: str, result:
     skill_conf = result.get("skill_confidence", {})
 
     with get_db() as db:
+        # Take the write lock before reading, so concurrent submissions for
+        # the same question cannot both see it unscored and double-count it
+        db.execute("BEGIN IMMEDIATE")
+
         # Replay last answer row to check retry flag
         prev = db.execute(
-            "SELECT retry_used FROM answers WHERE question_id=?",
+            "SELECT retry_used, score FROM answers WHERE question_id=?",
             (question_id,)
         ).fetchone()
 
@@ -108,6 +327,13 @@ def _store_evaluation(interview_id: int, question_id: int, answer: str, result:
                     "UPDATE answers SET answer_text=?, retry_used=1, score=NULL WHERE question_id=?",
                     (answer, question_id)
                 )
+                # Clearing an existing score un-counts the answer
+                if prev["score"] is not None:
+                    db.execute(
+                        "UPDATE interviews SET answered_count = answered_count - 1 WHERE id=?",
+                        (interview_id,)
+                    )
+                    candidate_summary.refresh(db, interview_id)
             else:
                 db.execute(
                     "INSERT INTO answers (question_id, answer_text, retry_used, score) VALUES (?, ?, 1, NULL)",
@@ -129,23 +355,28 @@ def _store_evaluation(interview_id: int, question_id: int, answer: str, result:
                 (question_id, answer, retry_used, score)
             )
 
-        # Update skill confidence values in skills table
-        # (Insert skills if not yet stored for interview)
-        for skill, conf in skill_conf.items():
-            # Try update first
-            row = db.execute("""
-                SELECT id FROM skills
-                WHERE interview_id=? AND name=?
-            """, (interview_id, skill)).fetchone()
+        # First final score for this question → bump the progress counter
+        if not prev or prev["score"] is None:
+            db.execute(
+                "UPDATE interviews SET answered_count = answered_count + 1 WHERE id=?",
+                (interview_id,)
+            )
 
-            if row:
-                db.execute(
-                    "UPDATE skills SET confidence_score=? WHERE id=?",
-                    (conf, row["id"])
-                )
-            else:
-                db.execute(
-                    "INSERT INTO skills (interview_id, name, importance_score, confidence_score) "
-                    "VALUES (?, ?, 50, ?)",
-                    (interview_id, skill, conf)
-                )
+        candidate_summary.refresh(db, interview_id)
+
+        # Upsert latest skill confidence + append history, batched
+        # (clamped: one out-of-range value would otherwise fail the batch)
+        skill_rows = [
+            (interview_id, question_id, skill, min(100, max(1, int(conf))))
+            for skill, conf in skill_conf.items()
+        ]
+        db.executemany("""
+            INSERT INTO skills (interview_id, name, importance_score, confidence_score)
+            VALUES (?, ?, 50, ?)
+            ON CONFLICT(interview_id, name)
+            DO UPDATE SET confidence_score = excluded.confidence_score
+        """, [(i, name, conf) for i, _, name, conf in skill_rows])
+        db.executemany("""
+            INSERT INTO skill_confidence_history (interview_id, question_id, name, confidence_score)
+            VALUES (?, ?, ?, ?)
+        """, skill_rows)
@@ -0,0 +1,125 @@
+import json
+import threading
+
+from app.config import JD_PROMPT_MODE, LLM_FAST_MODEL, get_config_snapshot
+from app.services import llm_gateway
+from app.utils.tokens import count_tokens
+
+# Prompt-side JD usage: how often the digest replaced the raw text and
+# how many prompt tokens that saved
+_stats = {"prompts": 0, "digest_prompts": 0, "tokens_saved": 0}
+_stats_lock = threading.Lock()
+
+
+def _digest_messages(jd_text: str) -> list:
+    prompt = f"""
+Condense the job description below into the facts an interviewer needs.
+
+Job Description:
+{jd_text}
+
+Respond ONLY with valid JSON:
+{{
+  "seniority": "Junior/Mid-Level/Senior/Lead",
+  "required_skills": ["skill1", "skill2"],
+  "key_responsibilities": ["short phrase", "short phrase"]
+}}
+
+Rules:
+- At most 15 required_skills and 8 key_responsibilities.
+- Short phrases only; drop benefits, company blurb and boilerplate.
+"""
+    return [
+        {"role": "system", "content": "Respond only with valid JSON."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _render_digest(raw: str) -> str:
+    """Turn the model's JSON into the compact text used in prompts."""
+    data = json.loads(raw)
+    skills = [str(s) for s in data.get("required_skills") or []]
+    duties = [str(d) for d in data.get("key_responsibilities") or []]
+    if not skills and not duties:
+        raise ValueError("JD digest is empty")
+
+    lines = [f"Seniority: {data.get('seniority') or 'Unspecified'}"]
+    if skills:
+        lines.append("Required skills: " + ", ".join(skills))
+    if duties:
+        lines.append("Key responsibilities:")
+        lines.extend(f"- {d}" for d in duties)
+    return "\n".join(lines)
+
+
+def build_jd_digest(jd_text: str):
+    """
+    Compact digest of a JD (seniority, required skills, responsibilities).
+    Returns None if the model call fails; prompts then use the raw text.
+    """
+    try:
+        response = llm_gateway.chat(
+            _digest_messages(jd_text),
+            model=LLM_FAST_MODEL,
+            temperature=0,
+            purpose="jd_digest",
+            response_format={"type": "json_object"},
+        )
+        return _render_digest(response.choices[0].message.content)
+    except Exception as e:
+        print("JD digest failed, falling back to raw JD:", e)
+        return None
+
+
+async def build_jd_digest_async(jd_text: str):
+    """Non-blocking build_jd_digest() for async routes."""
+    try:
+        response = await llm_gateway.achat(
+            _digest_messages(jd_text),
+            model=LLM_FAST_MODEL,
+            temperature=0,
+            purpose="jd_digest",
+            response_format={"type": "json_object"},
+        )
+        return _render_digest(response.choices[0].message.content)
+    except Exception as e:
+        print("JD digest failed, falling back to raw JD:", e)
+        return None
+
+
+def jd_token_counts(content: str, digest) -> dict:
+    raw_tokens = count_tokens(content)
+    digest_tokens = count_tokens(digest) if digest else None
+    return {"raw_tokens": raw_tokens, "digest_tokens": digest_tokens}
+
+
+def get_prompt_job_description() -> str:
+    """
+    The JD text to embed in prompts: the stored digest when
+    JD_PROMPT_MODE is "digest" and one exists, the full text otherwise.
+    """
+    snap = get_config_snapshot()
+    use_digest = JD_PROMPT_MODE == "digest" and bool(snap["jd_digest"])
+
+    with _stats_lock:
+        _stats["prompts"] += 1
+        if use_digest:
+            _stats["digest_prompts"] += 1
+            _stats["tokens_saved"] += max(0, snap["jd_raw_tokens"] - snap["jd_digest_tokens"])
+
+    return snap["jd_digest"] if use_digest else snap["job_description"]
+
+
+def get_jd_prompt_stats() -> dict:
+    snap = get_config_snapshot()
+    with _stats_lock:
+        stats = dict(_stats)
+    stats.update({
+        "mode": JD_PROMPT_MODE,
+        "raw_tokens": snap["jd_raw_tokens"],
+        "digest_tokens": snap["jd_digest_tokens"] if snap["jd_digest"] else None,
+        "avg_tokens_saved": (
+            round(stats["tokens_saved"] / stats["prompts"], 1) if stats["prompts"] else 0.0
+        ),
+    })
+    return stats
@@ -0,0 +1,148 @@
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import JOB_WORKERS, JOB_STALE_AFTER
+from app.database import get_db, run_db
+
+# Job states (mirrors the CHECK constraint on jobs.status)
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+
+# job_id -> Future, only for jobs submitted by this process
+_futures = {}
+_futures_lock = threading.Lock()
+
+# Lets a running job report progress without threading its id through
+_current = threading.local()
+
+
+def _set_status(job_id: int, status: str, progress: float = None, error: str = None):
+    with get_db() as db:
+        db.execute(
+            "UPDATE jobs SET status=?, progress=COALESCE(?, progress), error=?, "
+            "updated_at=CURRENT_TIMESTAMP WHERE id=?",
+            (status, progress, error, job_id)
+        )
+
+
+def _run(job_id: int, fn, args):
+    _current.job_id = job_id
+    _set_status(job_id, RUNNING)
+    try:
+        fn(*args)
+    except Exception as e:
+        print(f"Job {job_id} failed: {e}")
+        _set_status(job_id, FAILED, error=str(e))
+    else:
+        _set_status(job_id, DONE, progress=1.0)
+    finally:
+        _current.job_id = None
+        with _futures_lock:
+            _futures.pop(job_id, None)
+
+
+def create_job(kind: str, interview_id: int = None):
+    """
+    Record a queued job without starting it (see start_job).
+    Returns (job_id, created); created is False when an active job of the
+    same kind already exists for this interview and its id is returned.
+    """
+    with get_db() as db:
+        # Jobs whose worker died never finish; stop them blocking new ones
+        db.execute("""
+            UPDATE jobs SET status=?, error='stale', updated_at=CURRENT_TIMESTAMP
+            WHERE kind=? AND interview_id IS ? AND status IN (?, ?)
+              AND updated_at < datetime('now', ?)
+        """, (FAILED, kind, interview_id, QUEUED, RUNNING, f"-{JOB_STALE_AFTER} seconds"))
+
+        try:
+            job_id = db.execute(
+                "INSERT INTO jobs (kind, interview_id, status) VALUES (?, ?, ?)",
+                (kind, interview_id, QUEUED)
+            ).lastrowid
+        except sqlite3.IntegrityError:
+            # Collapsed onto the active job (idx_jobs_active)
+            return db.execute("""
+                SELECT id FROM jobs
+                WHERE kind=? AND interview_id=? AND status IN (?, ?)
+            """, (kind, interview_id, QUEUED, RUNNING)).fetchone()["id"], False
+
+    return job_id, True
+
+
+def start_job(job_id: int, fn, *args, executor: ThreadPoolExecutor = None):
+    """
+    Hand `fn(*args)` for a job created with create_job() to the worker pool
+    (or to `executor`, for long jobs that must not tie up the shared one).
+    """
+    with _futures_lock:
+        _futures[job_id] = (executor or _executor).submit(_run, job_id, fn, args)
+
+
+def enqueue(kind: str, interview_id: int, fn, *args) -> int:
+    """
+    Record a queued job and hand `fn(*args)` to the worker pool.
+    Returns the job id. If a job of the same kind is already queued or
+    running for this interview (in any worker process), that job's id is
+    returned instead and nothing new is started.
+    """
+    job_id, created = create_job(kind, interview_id)
+    if created:
+        start_job(job_id, fn, *args)
+    return job_id
+
+
+def report_progress(progress: float):
+    """Update progress (0-1) of the job running on this thread, if any."""
+    job_id = getattr(_current, "job_id", None)
+    if job_id is not None:
+        with get_db() as db:
+            db.execute(
+                "UPDATE jobs SET progress=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
+                (progress, job_id)
+            )
+
+
+def get_job(job_id: int):
+    with get_db() as db:
+        return db.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+
+
+def get_latest_job(kind: str, interview_id: int):
+    with get_db() as db:
+        return db.execute("""
+            SELECT * FROM jobs
+            WHERE kind=? AND interview_id=?
+            ORDER BY id DESC LIMIT 1
+        """, (kind, interview_id)).fetchone()
+
+
+async def wait_for_job(job_id: int, timeout: float, poll_interval: float = 0.2) -> str:
+    """
+    Wait until a job finishes or `timeout` elapses; returns its last status.
+    Jobs owned by this process are awaited directly, jobs started by
+    another worker process are polled from the DB.
+    """
+    with _futures_lock:
+        fut = _futures.get(job_id)
+
+    if fut is not None:
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(fut)), timeout)
+        except asyncio.TimeoutError:
+            pass
+    else:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            job = await run_db(get_job, job_id)
+            if not job or job["status"] in FINISHED:
+                break
+            await asyncio.sleep(poll_interval)
+
+    job = await run_db(get_job, job_id)
+    return job["status"] if job else FAILED
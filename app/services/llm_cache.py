@@ -0,0 +1,92 @@
+import hashlib
+import json
+import threading
+import time
+
+from app.config import LLM_CACHE_MAX_BYTES
+from app.database import get_db
+
+# Per-process counters; entries/bytes come from the shared table
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, n: int = 1):
+    with _stats_lock:
+        _stats[name] += n
+
+
+def make_key(model: str, temperature: float, messages: list, **kwargs) -> str:
+    """Content address of a request: anything that can change the response."""
+    payload = json.dumps(
+        {"model": model, "temperature": temperature, "messages": messages, "kwargs": kwargs},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get(key: str):
+    """Stored response JSON for `key`, or None. Bumps its LRU position."""
+    with get_db() as db:
+        row = db.execute("SELECT response FROM llm_cache WHERE key=?", (key,)).fetchone()
+        if row:
+            db.execute(
+                "UPDATE llm_cache SET hits = hits + 1, last_used_at=? WHERE key=?",
+                (time.time(), key)
+            )
+
+    _count("hits" if row else "misses")
+    return row["response"] if row else None
+
+
+def put(key: str, model: str, response_json: str):
+    """Store a response and evict least-recently-used entries over the size cap."""
+    now = time.time()
+    with get_db() as db:
+        db.execute("""
+            INSERT INTO llm_cache (key, model, response, bytes, created_at, last_used_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                response = excluded.response,
+                bytes = excluded.bytes,
+                last_used_at = excluded.last_used_at
+        """, (key, model, response_json, len(response_json.encode("utf-8")), now, now))
+
+        # Keep the most recently used entries whose running size fits the cap
+        evicted = db.execute("""
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(bytes) OVER (
+                        ORDER BY last_used_at DESC, key
+                    ) AS running
+                    FROM llm_cache
+                )
+                WHERE running > ?
+            )
+        """, (LLM_CACHE_MAX_BYTES,)).rowcount
+
+    _count("stores")
+    if evicted:
+        _count("evictions", evicted)
+
+
+def clear():
+    with get_db() as db:
+        db.execute("DELETE FROM llm_cache")
+
+
+def get_cache_stats() -> dict:
+    with get_db() as db:
+        row = db.execute(
+            "SELECT COUNT(*) AS entries, COALESCE(SUM(bytes), 0) AS bytes FROM llm_cache"
+        ).fetchone()
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats.update({
+        "entries": row["entries"],
+        "bytes": row["bytes"],
+        "max_bytes": LLM_CACHE_MAX_BYTES,
+        "hit_rate": round(stats["hits"] / lookups, 3) if lookups else 0.0,
+    })
+    return stats
@@ -0,0 +1,237 @@
+import threading
+import time
+
+import httpx
+from openai import OpenAI, AsyncOpenAI
+from openai.types.chat import ChatCompletion
+
+from app.config import (
+    OPENAI_API_KEY,
+    LLM_MODEL,
+    LLM_TIMEOUT,
+    LLM_CONNECT_TIMEOUT,
+    LLM_MAX_RETRIES,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE,
+    LLM_KEEPALIVE_EXPIRY,
+    LLM_CACHE_ENABLED,
+)
+from app.database import run_db
+from app.services import llm_cache
+
+# One long-lived client per process so every call reuses pooled
+# keep-alive connections instead of paying a fresh TLS handshake.
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+# Latency and token stats per call purpose (evaluation, followup, ...)
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+
+
+def get_client() -> OpenAI:
+    """Return the shared OpenAI client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenAI(
+                    api_key=OPENAI_API_KEY,
+                    max_retries=LLM_MAX_RETRIES,
+                    timeout=_timeout(),
+                    http_client=httpx.Client(limits=_limits(), timeout=_timeout()),
+                )
+    return _client
+
+
+def get_async_client() -> AsyncOpenAI:
+    """Return the shared AsyncOpenAI client for use on the event loop."""
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                _async_client = AsyncOpenAI(
+                    api_key=OPENAI_API_KEY,
+                    max_retries=LLM_MAX_RETRIES,
+                    timeout=_timeout(),
+                    http_client=httpx.AsyncClient(limits=_limits(), timeout=_timeout()),
+                )
+    return _async_client
+
+
+def _entry(purpose: str, model: str) -> dict:
+    # Caller holds _stats_lock
+    entry = _stats.setdefault(purpose, {
+        "model": model,
+        "calls": 0,
+        "errors": 0,
+        "total_ms": 0.0,
+        "max_ms": 0.0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cache_hits": 0,
+    })
+    entry["model"] = model
+    return entry
+
+
+def _record(purpose: str, model: str, elapsed_ms: float, ok: bool, usage=None):
+    with _stats_lock:
+        entry = _entry(purpose, model)
+        entry["calls"] += 1
+        if not ok:
+            entry["errors"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        if usage is not None:
+            entry["prompt_tokens"] += usage.prompt_tokens or 0
+            entry["completion_tokens"] += usage.completion_tokens or 0
+
+
+def _record_cache_hit(purpose: str, model: str):
+    with _stats_lock:
+        _entry(purpose, model)["cache_hits"] += 1
+
+
+def chat(messages: list, model: str = None, temperature: float = 0.2,
+         purpose: str = "default", cache: bool = False, **kwargs):
+    """
+    Run a chat completion through the shared client.
+    Returns the raw OpenAI response and records call latency under `purpose`.
+    With cache=True an identical earlier request is answered from the
+    persistent response cache (only for calls whose output may be reused).
+    """
+    model = model or LLM_MODEL
+    key = None
+    if cache and LLM_CACHE_ENABLED:
+        key = llm_cache.make_key(model, temperature, messages, **kwargs)
+        cached = _cache_get(key)
+        if cached is not None:
+            _record_cache_hit(purpose, model)
+            return cached
+
+    response = _chat(messages, model, temperature, purpose, **kwargs)
+    if key:
+        _cache_put(key, model, response)
+    return response
+
+
+def _cache_get(key: str):
+    # Cache trouble must never fail the call; treat it as a miss
+    try:
+        cached = llm_cache.get(key)
+        return ChatCompletion.model_validate_json(cached) if cached is not None else None
+    except Exception as e:
+        print("LLM cache read failed:", e)
+        return None
+
+
+def _cache_put(key: str, model: str, response):
+    try:
+        llm_cache.put(key, model, response.model_dump_json())
+    except Exception as e:
+        print("LLM cache write failed:", e)
+
+
+def _chat(messages: list, model: str, temperature: float, purpose: str, **kwargs):
+    start = time.perf_counter()
+    response = None
+    try:
+        response = get_client().chat.completions.create(
+            model=model,
+            temperature=temperature,
+            messages=messages,
+            **kwargs
+        )
+        return response
+    finally:
+        _record(purpose, model, (time.perf_counter() - start) * 1000,
+                response is not None, getattr(response, "usage", None))
+
+
+async def achat(messages: list, model: str = None, temperature: float = 0.2,
+                purpose: str = "default", cache: bool = False, **kwargs):
+    """Async counterpart of chat(); never blocks the event loop."""
+    model = model or LLM_MODEL
+    key = None
+    if cache and LLM_CACHE_ENABLED:
+        key = llm_cache.make_key(model, temperature, messages, **kwargs)
+        cached = await run_db(_cache_get, key)
+        if cached is not None:
+            _record_cache_hit(purpose, model)
+            return cached
+
+    response = await _achat(messages, model, temperature, purpose, **kwargs)
+    if key:
+        await run_db(_cache_put, key, model, response)
+    return response
+
+
+async def _achat(messages: list, model: str, temperature: float, purpose: str, **kwargs):
+    start = time.perf_counter()
+    response = None
+    try:
+        response = await get_async_client().chat.completions.create(
+            model=model,
+            temperature=temperature,
+            messages=messages,
+            **kwargs
+        )
+        return response
+    finally:
+        _record(purpose, model, (time.perf_counter() - start) * 1000,
+                response is not None, getattr(response, "usage", None))
+
+
+async def astream(messages: list, model: str = None, temperature: float = 0.2,
+                  purpose: str = "default", **kwargs):
+    """Async generator yielding content deltas of a streamed chat completion."""
+    model = model or LLM_MODEL
+    start = time.perf_counter()
+    ok = False
+    usage = None
+    try:
+        stream = await get_async_client().chat.completions.create(
+            model=model,
+            temperature=temperature,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},  # usage arrives in the last chunk
+            **kwargs
+        )
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        ok = True
+    finally:
+        _record(purpose, model, (time.perf_counter() - start) * 1000, ok, usage)
+
+
+def get_llm_stats() -> dict:
+    """Snapshot of per-purpose call counts, latency (ms) and token usage."""
+    with _stats_lock:
+        return {
+            purpose: {
+                **entry,
+                "total_ms": round(entry["total_ms"], 1),
+                "max_ms": round(entry["max_ms"], 1),
+                "avg_ms": round(entry["total_ms"] / entry["calls"], 1) if entry["calls"] else 0.0,
+                "avg_prompt_tokens": round(entry["prompt_tokens"] / entry["calls"], 1) if entry["calls"] else 0.0,
+            }
+            for purpose, entry in _stats.items()
+        }
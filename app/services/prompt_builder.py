@@ -0,0 +1,81 @@
+import threading
+
+from app.config import PROMPT_TOKEN_BUDGET, PROMPT_SECTION_MIN_TOKENS
+from app.utils.tokens import count_tokens, truncate_tokens
+
+# Variable prompt sections, most important first. When a prompt is over
+# budget the sections at the end of this list are trimmed first.
+SECTION_PRIORITY = ("answer", "question", "profile", "jd", "resume")
+
+TRUNCATION_MARKER = "\n...[truncated]"
+_MARKER_TOKENS = count_tokens(TRUNCATION_MARKER)
+
+_stats = {"prompts": 0, "trimmed_prompts": 0, "tokens_trimmed": {}}
+_stats_lock = threading.Lock()
+
+
+def _messages_tokens(messages: list) -> int:
+    return sum(count_tokens(m["content"]) for m in messages)
+
+
+def _fit(sizes: dict, available: int) -> dict:
+    """Token allowance per section so that their sum fits in `available`."""
+    allowed = dict(sizes)
+    over = sum(sizes.values()) - available
+    order = [name for name in reversed(SECTION_PRIORITY) if name in sizes]
+
+    # First shrink sections down to the floor, lowest priority first;
+    # only if that is not enough, cut into the floors in the same order.
+    for floor in (PROMPT_SECTION_MIN_TOKENS, 0):
+        for name in order:
+            if over <= 0:
+                return allowed
+            cut = min(over, max(0, allowed[name] - floor))
+            allowed[name] -= cut
+            over -= cut
+    return allowed
+
+
+def build_messages(render, budget: int = None, **kwargs) -> list:
+    """
+    Render chat messages within a prompt token budget.
+
+    `render(**kwargs)` returns the message list. Keyword arguments named
+    in SECTION_PRIORITY are variable text that may be trimmed; anything
+    else is passed through unchanged.
+    """
+    budget = budget or PROMPT_TOKEN_BUDGET
+    sections = {k: v or "" for k, v in kwargs.items() if k in SECTION_PRIORITY}
+    sizes = {k: count_tokens(v) for k, v in sections.items()}
+
+    # Fixed instructions around the sections
+    overhead = _messages_tokens(render(**{**kwargs, **{k: "" for k in sections}}))
+    allowed = _fit(sizes, budget - overhead)
+
+    trimmed = {}
+    for name, limit in allowed.items():
+        if limit < sizes[name]:
+            kwargs[name] = truncate_tokens(sections[name], limit - _MARKER_TOKENS) + TRUNCATION_MARKER
+            trimmed[name] = sizes[name] - limit
+
+    with _stats_lock:
+        _stats["prompts"] += 1
+        if trimmed:
+            _stats["trimmed_prompts"] += 1
+            for name, n in trimmed.items():
+                _stats["tokens_trimmed"][name] = _stats["tokens_trimmed"].get(name, 0) + n
+
+    if trimmed:
+        print(f"Prompt over budget ({overhead + sum(sizes.values())} > {budget} tokens), trimmed: {trimmed}")
+
+    return render(**kwargs)
+
+
+def get_prompt_stats() -> dict:
+    with _stats_lock:
+        return {
+            "budget": PROMPT_TOKEN_BUDGET,
+            "prompts": _stats["prompts"],
+            "trimmed_prompts": _stats["trimmed_prompts"],
+            "tokens_trimmed": dict(_stats["tokens_trimmed"]),
+        }
@@ -0,0 +1,164 @@
+from app.config import (
+    get_question_limits,
+    QUESTION_LOW_WATER_MARK,
+    QUESTION_BATCH_SIZE,
+    PREGEN_WAIT_TIMEOUT,
+)
+from app.database import get_db, run_db
+from app.services import job_queue
+from app.services.question_service import (
+    generate_consequential_questions,
+    generate_consequential_questions_async,
+    get_interview_progress,
+)
+
+TOP_UP_JOB = "pregenerate_questions"
+SOURCE_TYPES = ("consequential", "followup")
+
+
+def get_stock(interview_id: int) -> dict:
+    """
+    Per source type: generated, asked and unasked question counts.
+    """
+    with get_db() as db:
+        rows = db.execute("""
+            SELECT source_type,
+                   COUNT(*) AS generated,
+                   COALESCE(SUM(asked), 0) AS asked
+            FROM questions
+            WHERE interview_id = ?
+            GROUP BY source_type
+        """, (interview_id,)).fetchall()
+
+    stock = {t: {"generated": 0, "asked": 0, "unasked": 0} for t in SOURCE_TYPES}
+    for r in rows:
+        stock[r["source_type"]] = {
+            "generated": r["generated"],
+            "asked": r["asked"],
+            "unasked": r["generated"] - r["asked"],
+        }
+    return stock
+
+
+def _consequential_needed(interview_id: int) -> int:
+    """
+    Consequential questions the interview can still ask: what is left of
+    total_questions after the questions already served (answered or not),
+    bounded by consequential_max unless the remaining follow-up allowance
+    cannot cover the rest.
+    """
+    total_questions, consequential_max, followup_max = get_question_limits()
+    _, conseq_asked, followup_asked = get_interview_progress(interview_id)
+
+    still_needed = max(0, total_questions - (conseq_asked + followup_asked))
+    followups_left = max(0, followup_max - followup_asked)
+
+    needed = max(consequential_max - conseq_asked, still_needed - followups_left)
+    return max(0, min(needed, still_needed))
+
+
+def _top_up_count(interview_id: int) -> int:
+    """
+    How many consequential questions to generate now (0 = stock is fine).
+    Only tops up below the low-water mark, and never beyond what the
+    interview still needs.
+    """
+    unasked = get_stock(interview_id)["consequential"]["unasked"]
+    remaining = _consequential_needed(interview_id)
+
+    if unasked >= min(QUESTION_LOW_WATER_MARK, remaining):
+        return 0
+
+    return max(1, min(QUESTION_BATCH_SIZE, remaining - unasked))
+
+
+def top_up(interview_id: int) -> int:
+    """Generate consequential questions if stock is low; returns how many were requested."""
+    count = _top_up_count(interview_id)
+    if count:
+        generate_consequential_questions(interview_id, count)
+    return count
+
+
+async def top_up_async(interview_id: int) -> int:
+    """Non-blocking top_up() for async routes."""
+    count = await run_db(_top_up_count, interview_id)
+    if count:
+        await generate_consequential_questions_async(interview_id, count)
+    return count
+
+
+def _pending_top_up(interview_id: int):
+    job = job_queue.get_latest_job(TOP_UP_JOB, interview_id)
+    if job and job["status"] not in job_queue.FINISHED:
+        return job
+    return None
+
+
+def schedule_top_up(interview_id: int):
+    """
+    Enqueue a background top-up if stock is below the low-water mark and
+    no top-up job is already pending. Returns the job id (or None).
+    """
+    pending = _pending_top_up(interview_id)
+    if pending:
+        return pending["id"]
+    if not _top_up_count(interview_id):
+        return None
+    return job_queue.enqueue(TOP_UP_JOB, interview_id, top_up, interview_id)
+
+
+async def ensure_stock_async(interview_id: int):
+    """
+    Make sure at least one consequential question is ready to serve:
+    wait on a pending top-up job first, generate inline only as a fallback.
+    """
+    stock = await run_db(get_stock, interview_id)
+    if stock["consequential"]["unasked"]:
+        return
+
+    pending = await run_db(_pending_top_up, interview_id)
+    if pending:
+        await job_queue.wait_for_job(pending["id"], PREGEN_WAIT_TIMEOUT)
+
+    await top_up_async(interview_id)
+
+
+def get_inventory_stats(interview_id: int) -> dict:
+    """
+    Generated / asked / unasked / wasted per source type. Wasted means
+    unasked questions the interview can no longer use.
+    """
+    _, _, followup_max = get_question_limits()
+    stock = get_stock(interview_id)
+
+    with get_db() as db:
+        row = db.execute("SELECT status FROM interviews WHERE id=?", (interview_id,)).fetchone()
+    finished = bool(row) and row["status"] in ("COMPLETED", "REPORTED")
+
+    remaining = {
+        "consequential": _consequential_needed(interview_id),
+        "followup": max(0, followup_max - stock["followup"]["asked"]),
+    }
+    for source_type, counts in stock.items():
+        usable = 0 if finished else remaining[source_type]
+        counts["wasted"] = max(0, counts["unasked"] - usable)
+
+    return stock
+
+
+def get_inventory_totals() -> dict:
+    """Process-independent totals across all interviews."""
+    with get_db() as db:
+        rows = db.execute("""
+            SELECT source_type,
+                   COUNT(*) AS generated,
+                   COALESCE(SUM(asked), 0) AS asked
+            FROM questions
+            GROUP BY source_type
+        """).fetchall()
+
+    return {
+        r["source_type"]: {"generated": r["generated"], "asked": r["asked"]}
+        for r in rows
+    }
@@ -1,18 +1,15 @@
+import asyncio
 import json
-from openai import OpenAI
-from app.config import OPENAI_API_KEY, get_question_limits
-from app.database import get_db
-
-
-def get_openai_client():
-    return OpenAI(api_key=OPENAI_API_KEY)
+import threading
+from app.database import get_db, run_db
+from app.services import llm_gateway
+from app.services.prompt_builder import build_messages
+from app.services.jd_service import get_prompt_job_description
 
 
 def get_global_job_description():
-    """Fetch the single global Job Description text."""
-    with get_db() as db:
-        row = db.execute("SELECT content FROM job_description").fetchone()
-        return row["content"] if row else ""
+    """Global Job Description as used in prompts (digest or raw, see JD_PROMPT_MODE)."""
+    return get_prompt_job_description()
 
 
 def get_candidate_profile(interview_id: int) -> dict:
@@ -37,24 +34,21 @@ def save_consequential_questions(interview_id: int, questions: list):
             )
 
 
-def generate_consequential_questions(interview_id: int, count: int = 8):
-    """
-    Generate the first set of challenging multi-skill questions.
-    These are based on:
-    - Resume skill importance
-    - Expertise area
-    - Job Description alignment
-    """
-    profile = get_candidate_profile(interview_id)
-    jd = get_global_job_description()
+def _consequential_messages(profile: dict, jd: str, count: int) -> list:
+    return build_messages(
+        _render_consequential,
+        profile=json.dumps(profile), jd=jd, count=count
+    )
+
 
+def _render_consequential(profile: str, jd: str, count: int) -> list:
     prompt = f"""
 You are an elite technical interviewer screening for top 5% talent.
 
 Create {count} highly challenging, multi-skill, real-world scenario questions.
 
 Base them on:
-Candidate Profile: {json.dumps(profile)}
+Candidate Profile: {profile}
 Job Description: {jd}
 
 Rules:
@@ -65,19 +59,50 @@ Rules:
 - Each question must require reasoning, decision-making, and tradeoffs
 - JSON ONLY. No markdown.
 """
+    return [
+        {"role": "system", "content": "Respond with valid JSON only!"},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _load_profile_and_jd(interview_id: int):
+    return get_candidate_profile(interview_id), get_global_job_description()
+
+
+def generate_consequential_questions(interview_id: int, count: int = 8):
+    """
+    Generate the first set of challenging multi-skill questions.
+    These are based on:
+    - Resume skill importance
+    - Expertise area
+    - Job Description alignment
+    """
+    profile, jd = _load_profile_and_jd(interview_id)
 
-    response = get_openai_client().chat.completions.create(
-        model="gpt-4o",
+    response = llm_gateway.chat(
+        _consequential_messages(profile, jd, count),
         temperature=0.6,
-        messages=[
-            {"role": "system", "content": "Respond with valid JSON only!"},
-            {"role": "user", "content": prompt}
-        ]
+        purpose="consequential_questions",
     )
 
     content = response.choices[0].message.content
     questions = json.loads(content)
-    save_consequential_questions(interview_id, questions)
+    save_consequential_questions(interview_id, questions[:count])
+
+
+async def generate_consequential_questions_async(interview_id: int, count: int = 8):
+    """Non-blocking generate_consequential_questions() for async routes."""
+    profile, jd = await run_db(_load_profile_and_jd, interview_id)
+
+    response = await llm_gateway.achat(
+        _consequential_messages(profile, jd, count),
+        temperature=0.6,
+        purpose="consequential_questions",
+    )
+
+    content = response.choices[0].message.content
+    questions = json.loads(content)
+    await run_db(save_consequential_questions, interview_id, questions[:count])
 
 
 def get_last_answer(interview_id: int) -> dict:
@@ -95,11 +120,7 @@ def get_last_answer(interview_id: int) -> dict:
         """, (interview_id,)).fetchone()
 
 
-def generate_followup_question(interview_id: int) -> str:
-    """
-    Generate a deeper and harder follow-up question based on the last answer.
-    Ensures proper DB storage as a string.
-    """
+def _load_followup_context(interview_id: int):
     profile = get_candidate_profile(interview_id)
     last = get_last_answer(interview_id)
     jd = get_global_job_description()
@@ -107,19 +128,27 @@ def generate_followup_question(interview_id: int) -> str:
     if not last:
         raise ValueError("Cannot generate follow-up: No previous answer.")
 
-    last_question = last["question_text"]
-    last_answer = last["answer_text"]
+    return profile, jd, last["question_text"], last["answer_text"]
 
+
+def _followup_messages(profile: dict, jd: str, last_question: str, last_answer: str) -> list:
+    return build_messages(
+        _render_followup,
+        question=last_question, answer=last_answer, profile=json.dumps(profile), jd=jd
+    )
+
+
+def _render_followup(question: str, answer: str, profile: str, jd: str) -> list:
     prompt = f"""
 You are an elite interviewer. Based on the previous Q&A below, generate ONE new question:
 
 Previous Question:
-{last_question}
+{question}
 
 Candidate Answer:
-{last_answer}
+{answer}
 
-Candidate Profile: {json.dumps(profile)}
+Candidate Profile: {profile}
 Job Description: {jd}
 
 Rules:
@@ -129,17 +158,13 @@ Rules:
 - JSON ONLY. No markdown.
 - Output as a JSON array of strings
     """
+    return [
+        {"role": "system", "content": "Respond with valid JSON only!"},
+        {"role": "user", "content": prompt}
+    ]
 
-    response = get_openai_client().chat.completions.create(
-        model="gpt-4o",
-        temperature=0.8,
-        messages=[
-            {"role": "system", "content": "Respond with valid JSON only!"},
-            {"role": "user", "content": prompt}
-        ]
-    )
 
-    raw = response.choices[0].message.content
+def _parse_followup(raw: str) -> str:
     try:
         next_q = json.loads(raw)
         if not isinstance(next_q, str):
@@ -147,13 +172,168 @@ Rules:
     except Exception:
         # Last line fallback — ensure a string always goes into DB
         next_q = raw.strip()
+    return next_q
 
-    # Store into DB
+
+# interviews column holding the asked count for each source type
+ASKED_COUNTERS = {"consequential": "consequential_asked", "followup": "followup_asked"}
+
+
+def mark_question_asked(db, interview_id: int, question_id: int, source_type: str) -> bool:
+    """
+    Mark a question asked and bump the interview's counter in the caller's
+    transaction. Returns False if it was already asked (served concurrently).
+    """
+    cursor = db.execute(
+        "UPDATE questions SET asked=1 WHERE id=? AND asked=0",
+        (question_id,)
+    )
+    if not cursor.rowcount:
+        return False
+
+    col = ASKED_COUNTERS[source_type]
+    db.execute(f"UPDATE interviews SET {col} = {col} + 1 WHERE id=?", (interview_id,))
+    return True
+
+
+def get_interview_progress(interview_id: int) -> tuple[int, int, int]:
+    """Return (answered, consequential_asked, followup_asked) from the interview row."""
+    with get_db() as db:
+        row = db.execute("""
+            SELECT answered_count, consequential_asked, followup_asked
+            FROM interviews WHERE id=?
+        """, (interview_id,)).fetchone()
+
+    if not row:
+        return 0, 0, 0
+    return row["answered_count"], row["consequential_asked"], row["followup_asked"]
+
+
+def save_followup_question(interview_id: int, question: str, asked: bool = False) -> int:
+    """Store a generated follow-up question and return its id."""
     with get_db() as db:
         cursor = db.execute(
             "INSERT INTO questions (interview_id, question_text, source_type, asked) VALUES (?, ?, 'followup', 0)",
-            (interview_id, next_q)
+            (interview_id, question)
         )
         q_id = cursor.lastrowid
+        if asked:
+            mark_question_asked(db, interview_id, q_id, "followup")
+        return q_id
 
-    return next_q
+
+def generate_followup_question(interview_id: int, mark_asked: bool = False) -> tuple[int, str]:
+    """
+    Generate a deeper and harder follow-up question based on the last answer.
+    Ensures proper DB storage as a string.
+    Pass mark_asked=True when the question is served right away.
+    """
+    profile, jd, last_question, last_answer = _load_followup_context(interview_id)
+
+    response = llm_gateway.chat(
+        _followup_messages(profile, jd, last_question, last_answer),
+        temperature=0.8,
+        purpose="followup_question",
+    )
+
+    next_q = _parse_followup(response.choices[0].message.content)
+    q_id = save_followup_question(interview_id, next_q, mark_asked)
+
+    return q_id, next_q
+
+
+async def generate_followup_question_async(interview_id: int, mark_asked: bool = False) -> tuple[int, str]:
+    """Non-blocking generate_followup_question() for async routes."""
+    profile, jd, last_question, last_answer = await run_db(_load_followup_context, interview_id)
+
+    response = await llm_gateway.achat(
+        _followup_messages(profile, jd, last_question, last_answer),
+        temperature=0.8,
+        purpose="followup_question",
+    )
+
+    next_q = _parse_followup(response.choices[0].message.content)
+    q_id = await run_db(save_followup_question, interview_id, next_q, mark_asked)
+
+    return q_id, next_q
+
+
+# Speculative follow-ups: drafted while the answer is being evaluated
+_speculation = {"attempts": 0, "hits": 0, "misses": 0, "failures": 0,
+                "used_tokens": 0, "wasted_tokens": 0}
+_speculation_lock = threading.Lock()
+
+
+def _count_speculation(**deltas):
+    with _speculation_lock:
+        for key, value in deltas.items():
+            _speculation[key] += value
+
+
+async def draft_followup_question_async(interview_id: int, question: str, answer: str) -> tuple[str, int]:
+    """
+    Generate (but do not store) a follow-up for the given Q&A pair.
+    Returns the question and the total tokens the call used.
+    """
+    profile, jd = await run_db(_load_profile_and_jd, interview_id)
+
+    response = await llm_gateway.achat(
+        _followup_messages(profile, jd, question, answer),
+        temperature=0.8,
+        purpose="followup_speculative",
+    )
+
+    tokens = response.usage.total_tokens if response.usage else 0
+    return _parse_followup(response.choices[0].message.content), tokens
+
+
+class SpeculativeFollowup:
+    """
+    A follow-up drafted concurrently with answer evaluation.
+    Call commit() if the turn picks a follow-up, discard() otherwise;
+    discarded drafts finish in the background and count as wasted tokens.
+    """
+
+    def __init__(self, interview_id: int, question: str, answer: str):
+        self.interview_id = interview_id
+        self.resolved = False
+        self.task = asyncio.create_task(
+            draft_followup_question_async(interview_id, question, answer)
+        )
+        _count_speculation(attempts=1)
+
+    async def commit(self) -> tuple[int, str]:
+        """Store the draft as the next (asked) follow-up; regenerate if the draft failed."""
+        self.resolved = True
+        try:
+            next_q, tokens = await self.task
+        except Exception as e:
+            print(f"⚠️ Speculative follow-up failed, regenerating: {e}")
+            _count_speculation(failures=1)
+            return await generate_followup_question_async(self.interview_id, mark_asked=True)
+
+        _count_speculation(hits=1, used_tokens=tokens)
+        q_id = await run_db(save_followup_question, self.interview_id, next_q, True)
+        return q_id, next_q
+
+    def discard(self):
+        if self.resolved:
+            return
+        self.resolved = True
+        _count_speculation(misses=1)
+        self.task.add_done_callback(_count_wasted)
+
+
+def _count_wasted(task):
+    if task.cancelled() or task.exception():
+        return
+    _, tokens = task.result()
+    _count_speculation(wasted_tokens=tokens)
+
+
+def get_speculation_stats() -> dict:
+    with _speculation_lock:
+        stats = dict(_speculation)
+    resolved = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / resolved, 3) if resolved else 0.0
+    return stats
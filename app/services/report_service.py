@@ -1,20 +1,17 @@
+import hashlib
 import json
 from datetime import datetime
-from openai import OpenAI
-from app.config import OPENAI_API_KEY
+from app.config import LLM_FAST_MODEL, get_pass_threshold
 from app.database import get_db
 from app.models.report_models import FinalReport, SkillAssessment
+from app.services import llm_gateway, job_queue, candidate_summary
 
-
-def get_openai_client():
-    return OpenAI(api_key=OPENAI_API_KEY)
+REPORT_JOB = "report"
 
 
 def _get_threshold() -> float:
     """Return stored threshold or default 0.85."""
-    with get_db() as db:
-        row = db.execute("SELECT value FROM pass_threshold LIMIT 1").fetchone()
-    return float(row["value"]) if row else 0.85
+    return get_pass_threshold()
 
 
 def _get_scores(interview_id: int):
@@ -58,7 +55,7 @@ def _classify_strengths_and_weaknesses(skills: list):
     return sorted_skills[:3], sorted_skills[-3:]
 
 
-def _get_ai_commentary(strengths, weaknesses):
+def _commentary_messages(strengths, weaknesses) -> list:
     prompt = f"""
 Provide structured commentary:
 
@@ -72,56 +69,69 @@ RETURN JSON ONLY in EXACT format:
   "anything_extra": "short remark"
 }}
 """
+    return [
+        {"role": "system", "content": "Return ONLY valid JSON. No markdown."},
+        {"role": "user", "content": prompt}
+    ]
 
-    try:
-        response = get_openai_client().chat.completions.create(
-            model="gpt-4o-mini",  # cheaper, faster, fewer token issues
-            temperature=0.2,
-            messages=[
-                {"role": "system", "content": "Return ONLY valid JSON. No markdown."},
-                {"role": "user", "content": prompt}
-            ],
-        )
-        content = response.choices[0].message.content.strip()
 
-        # Ensure not empty and JSON-parsable
-        if not content or not (content.startswith("{") and content.endswith("}")):
-            raise ValueError("Invalid or empty response from OpenAI")
+def _parse_commentary(response) -> dict:
+    content = response.choices[0].message.content.strip()
+
+    # Ensure not empty and JSON-parsable
+    if not content or not (content.startswith("{") and content.endswith("}")):
+        raise ValueError(f"Invalid or empty response from OpenAI: {content[:100]}")
+
+    return json.loads(content)
+
 
-        return json.loads(content)
+def _fallback_commentary(strengths, weaknesses, error: Exception) -> dict:
+    print("⚠️ AI commentary failed, using fallback.", str(error))
 
+    # SAFE fallback to prevent breaking reports
+    return {
+        "strength_comments": {
+            s["name"]: "Candidate showed strong performance in this skill."
+            for s in strengths
+        },
+        "weakness_comments": {
+            w["name"]: "This skill area needs deeper improvement."
+            for w in weaknesses
+        },
+        "anything_extra": "Automated fallback applied.",
+    }
+
+
+def _get_ai_commentary(strengths, weaknesses):
+    try:
+        response = llm_gateway.chat(
+            _commentary_messages(strengths, weaknesses),
+            model=LLM_FAST_MODEL,  # cheaper, faster, fewer token issues
+            temperature=0.2,
+            purpose="report_commentary",
+            cache=True,
+        )
+        return _parse_commentary(response)
     except Exception as e:
-        print("⚠️ AI commentary failed, using fallback.", str(e))
-        print("⚠️ Response content:", locals().get("content", " <None> "))
-
-        # SAFE fallback to prevent breaking reports
-        return {
-            "strength_comments": {
-                s["name"]: "Candidate showed strong performance in this skill."
-                for s in strengths
-            },
-            "weakness_comments": {
-                w["name"]: "This skill area needs deeper improvement."
-                for w in weaknesses
-            },
-            "anything_extra": "Automated fallback applied.",
-        }
+        return _fallback_commentary(strengths, weaknesses, e)
 
 
-def generate_final_report(interview_id: int) -> FinalReport:
-    """Compute final report, update DB, and return Pydantic model."""
+def _collect_report_inputs(interview_id: int):
+    """Read everything the report needs from the DB."""
     scores = _get_scores(interview_id)
     threshold = _get_threshold()
+    skills_raw = _get_skill_scores(interview_id)
+    strengths_raw, weaknesses_raw = _classify_strengths_and_weaknesses(skills_raw)
+    return scores, threshold, strengths_raw, weaknesses_raw
+
+
+def _build_report(scores, threshold, strengths_raw, weaknesses_raw, ai_comments) -> FinalReport:
     total_score = sum(scores)
     n = len(scores)
 
     # Scores are 1–5 → normalize to 0–1
     final_percentage = (total_score - n) / (4 * n) if n > 0 else 0.0
 
-    skills_raw = _get_skill_scores(interview_id)
-    strengths_raw, weaknesses_raw = _classify_strengths_and_weaknesses(skills_raw)
-    ai_comments = _get_ai_commentary(strengths_raw, weaknesses_raw)
-
     is_selected = final_percentage >= threshold
     recommendation = "SELECTED" if is_selected else "REJECTED"
 
@@ -147,7 +157,7 @@ def generate_final_report(interview_id: int) -> FinalReport:
         for s in weaknesses_raw
     ]
 
-    report = FinalReport(
+    return FinalReport(
         report_generated_at=datetime.utcnow().isoformat(),
         final_score=total_score,
         final_percentage=round(final_percentage, 3),
@@ -163,11 +173,45 @@ def generate_final_report(interview_id: int) -> FinalReport:
         anything_extra=ai_comments.get("anything_extra", ""),
     )
 
-    # Persist report JSON + status
+
+def report_etag(report_json: str) -> str:
+    return hashlib.sha256(report_json.encode("utf-8")).hexdigest()[:32]
+
+
+def _persist_report(interview_id: int, report: FinalReport):
+    """Persist report JSON + status, its ETag, and the ranking fields as columns."""
+    report_json = json.dumps(report.model_dump())
     with get_db() as db:
         db.execute(
-            "UPDATE interviews SET status='REPORTED', final_report=? WHERE id=?",
-            (json.dumps(report.model_dump()), interview_id),
+            "UPDATE interviews SET status='REPORTED', final_report=?, report_etag=?, "
+            "final_percentage=?, final_score=?, recommendation=? WHERE id=?",
+            (report_json, report_etag(report_json), report.final_percentage,
+             report.final_score, report.recommendation, interview_id),
         )
+        candidate_summary.refresh(db, interview_id)
+
+
+def generate_final_report(interview_id: int) -> FinalReport:
+    """Compute final report, update DB, and return Pydantic model."""
+    scores, threshold, strengths_raw, weaknesses_raw = _collect_report_inputs(interview_id)
+    job_queue.report_progress(0.25)
+
+    ai_comments = _get_ai_commentary(strengths_raw, weaknesses_raw)
+    job_queue.report_progress(0.75)
+
+    report = _build_report(scores, threshold, strengths_raw, weaknesses_raw, ai_comments)
+    _persist_report(interview_id, report)
 
     return report
+
+
+def enqueue_report(interview_id: int) -> int:
+    """
+    Generate the final report in the background. Concurrent requests for
+    the same interview collapse onto one job; returns its id.
+    """
+    return job_queue.enqueue(REPORT_JOB, interview_id, generate_final_report, interview_id)
+
+
+def get_report_job(interview_id: int):
+    return job_queue.get_latest_job(REPORT_JOB, interview_id)
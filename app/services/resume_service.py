@@ -1,18 +1,21 @@
-import json
-from app.utils.pdf2text import extract_text_from_pdf
-from app.database import get_db
-from app.config import MAX_PDF_SIZE, OPENAI_API_KEY
-from openai import OpenAI
-
-def get_openai_client():
-    return OpenAI(api_key=OPENAI_API_KEY)
-
-
+import asyncio
+import hashlib
 import json
 import re
+import threading
+from io import BytesIO
+
+from app.utils.pdf2text import extract_text_from_pdf
+from app.database import get_db, run_db
+from app.config import MAX_PDF_SIZE
+from app.services import llm_gateway
+from app.services.prompt_builder import build_messages
+from app.utils import blob_store
+from app.services import candidate_summary
 
-from openai import OpenAI
-from app.config import OPENAI_API_KEY
+# Duplicate uploads served from resume_fingerprints (per process)
+_dedup_stats = {"hits": 0, "misses": 0}
+_dedup_lock = threading.Lock()
 
 
 def clean_json(text: str) -> str:
@@ -30,15 +33,17 @@ def clean_json(text: str) -> str:
     return cleaned
 
 
-def analyze_resume(resume_text: str) -> dict:
-    client = OpenAI(api_key=OPENAI_API_KEY)
+def _resume_messages(resume_text: str) -> list:
+    return build_messages(_render_resume, resume=resume_text)
 
+
+def _render_resume(resume: str) -> list:
     prompt = f"""
 You are an expert technical recruiter. Analyze the resume text below
 and extract a detailed candidate profile.
 
 Resume:
-{resume_text}
+{resume}
 
 Respond ONLY with valid JSON matching this structure:
 
@@ -60,17 +65,13 @@ STRICT RULES:
 - No code fences (```).
 - No trailing commas.
 """
+    return [
+        {"role": "system", "content": "Respond only with valid JSON. No markdown."},
+        {"role": "user", "content": prompt}
+    ]
 
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": "Respond only with valid JSON. No markdown."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.2
-    )
 
-    raw = response.choices[0].message.content
+def _parse_profile(raw: str) -> dict:
     cleaned = clean_json(raw)
 
     try:
@@ -79,33 +80,162 @@ STRICT RULES:
         raise ValueError(f"Resume AI returned invalid JSON: {cleaned[:100]}...")
 
 
-def process_resume_upload(user_id: int, file_bytes: bytes) -> int:
+def analyze_resume(resume_text: str) -> dict:
+    response = llm_gateway.chat(
+        _resume_messages(resume_text),
+        temperature=0.2,
+        purpose="resume_analysis",
+        cache=True,
+    )
+    return _parse_profile(response.choices[0].message.content)
+
+
+async def analyze_resume_async(resume_text: str) -> dict:
+    response = await llm_gateway.achat(
+        _resume_messages(resume_text),
+        temperature=0.2,
+        purpose="resume_analysis",
+        cache=True,
+    )
+    return _parse_profile(response.choices[0].message.content)
+
+
+# Read size for hashing and copying uploads
+_CHUNK_SIZE = 64 * 1024
+
+
+def _as_file(resume):
+    """Uploads arrive as a spooled file; plain bytes are still accepted."""
+    return BytesIO(resume) if isinstance(resume, (bytes, bytearray)) else resume
+
+
+def _check_size(resume_file):
+    resume_file.seek(0, 2)
+    if resume_file.tell() > MAX_PDF_SIZE:
+        raise ValueError("PDF exceeds 3MB limit")
+
+
+def _check_and_extract(resume_file) -> str:
+    _check_size(resume_file)
+
+    # Extract all text for resume analysis
+    resume_text = extract_text_from_pdf(resume_file)
+    if not resume_text:
+        raise ValueError("Failed to read PDF text. Ensure it's text-based.")
+
+    return resume_text
+
+
+def resume_fingerprint(resume_file) -> str:
+    h = hashlib.sha256()
+    resume_file.seek(0)
+    for chunk in iter(lambda: resume_file.read(_CHUNK_SIZE), b""):
+        h.update(chunk)
+    return h.hexdigest()
+
+
+def lookup_fingerprint(digest: str):
+    """(resume_text, candidate_profile) of an already analyzed PDF, or None."""
+    with get_db() as db:
+        row = db.execute(
+            "SELECT resume_text, candidate_profile FROM resume_fingerprints WHERE sha256=?",
+            (digest,)
+        ).fetchone()
+
+    with _dedup_lock:
+        _dedup_stats["hits" if row else "misses"] += 1
+
+    if not row:
+        return None
+    return row["resume_text"], json.loads(row["candidate_profile"])
+
+
+def _create_interview(user_id: int, resume_file, resume_text: str,
+                      candidate_profile: dict, digest: str) -> int:
+    # PDF bytes go to the blob store; the row only references the hash
+    blob_store.put_file(resume_file, digest)
+
+    with get_db() as db:
+        return insert_interview(db, user_id, digest, resume_text, candidate_profile)
+
+
+def insert_interview(db, user_id: int, digest: str, resume_text: str, candidate_profile: dict) -> int:
+    """Insert the interview row and record the fingerprint, in the caller's transaction."""
+    profile_json = json.dumps(candidate_profile)
+    domain = candidate_profile.get("domain") if isinstance(candidate_profile, dict) else None
+    db.execute("""
+        INSERT INTO resume_fingerprints (sha256, resume_text, candidate_profile)
+        VALUES (?, ?, ?)
+        ON CONFLICT(sha256) DO UPDATE SET
+            uses = uses + 1,
+            last_used_at = CURRENT_TIMESTAMP
+    """, (digest, resume_text, profile_json))
+
+    cursor = db.execute(
+        "INSERT INTO interviews (user_id, resume_hash, resume_text, status, candidate_profile, domain) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (user_id, digest, resume_text, "GENERATING_QUESTIONS", profile_json,
+         domain if isinstance(domain, str) else None)
+    )
+    candidate_summary.on_interview_created(db, cursor.lastrowid)
+    return cursor.lastrowid
+
+
+def process_resume_upload(user_id: int, resume) -> int:
     """
     Full processing:
     - Validate size
-    - Extract text
-    - Analyze profile via LLM
+    - Reuse text + profile if these exact PDF bytes were seen before
+    - Otherwise extract text and analyze profile via LLM
     - Create Interview record
     - Store JSON profile
     """
-    if len(file_bytes) > MAX_PDF_SIZE:
-        raise ValueError("PDF exceeds 3MB limit")
+    resume_file = _as_file(resume)
+    _check_size(resume_file)
+    digest = resume_fingerprint(resume_file)
 
-    # Extract all text for resume analysis
-    resume_text = extract_text_from_pdf(file_bytes)
-    if not resume_text:
-        raise ValueError("Failed to read PDF text. Ensure it's text-based.")
+    known = lookup_fingerprint(digest)
+    if known:
+        resume_text, candidate_profile = known
+    else:
+        resume_text = _check_and_extract(resume_file)
 
-    # Get profile JSON from AI
-    candidate_profile = analyze_resume(resume_text)
+        # Get profile JSON from AI
+        candidate_profile = analyze_resume(resume_text)
 
     # Insert new interview
-    with get_db() as db:
-        cursor = db.execute(
-            "INSERT INTO interviews (user_id, resume_blob, resume_text, status, candidate_profile) "
-            "VALUES (?, ?, ?, ?, ?)",
-            (user_id, file_bytes, resume_text, "GENERATING_QUESTIONS", json.dumps(candidate_profile))
-        )
-        interview_id = cursor.lastrowid
+    interview_id = _create_interview(user_id, resume_file, resume_text, candidate_profile, digest)
+
+    return interview_id, candidate_profile
+
+
+async def process_resume_upload_async(user_id: int, resume) -> int:
+    """
+    Non-blocking process_resume_upload(): hashing, PDF parsing and the DB
+    insert run on worker threads, the LLM call on the async client.
+    `resume` is the PDF as bytes or a seekable binary file object.
+    """
+    resume_file = _as_file(resume)
+    _check_size(resume_file)
+    digest = await asyncio.to_thread(resume_fingerprint, resume_file)
+
+    known = await run_db(lookup_fingerprint, digest)
+    if known:
+        resume_text, candidate_profile = known
+    else:
+        resume_text = await asyncio.to_thread(_check_and_extract, resume_file)
+        candidate_profile = await analyze_resume_async(resume_text)
+
+    interview_id = await run_db(
+        _create_interview, user_id, resume_file, resume_text, candidate_profile, digest
+    )
 
     return interview_id, candidate_profile
+
+
+def get_resume_dedup_stats() -> dict:
+    with _dedup_lock:
+        stats = dict(_dedup_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    return stats
@@ -0,0 +1,51 @@
+"""
+Content-addressed file store for resume PDFs.
+
+Blobs live at BLOB_STORE_DIR/ab/cd/<sha256>; the hash is the only
+reference the database keeps. Writes are atomic (temp file + rename),
+so readers never see a partial blob and concurrent writers of the same
+content are harmless.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from app.config import BLOB_STORE_DIR
+
+
+def blob_path(digest: str) -> str:
+    return os.path.join(BLOB_STORE_DIR, digest[:2], digest[2:4], digest)
+
+
+def exists(digest: str) -> bool:
+    return os.path.exists(blob_path(digest))
+
+
+def put(data: bytes, digest: str = None) -> str:
+    """Store `data` (if not already present); returns its sha256 hex digest."""
+    return put_file(BytesIO(data), digest or hashlib.sha256(data).hexdigest())
+
+
+def put_file(fileobj, digest: str) -> str:
+    """Store a binary file object under its known digest, copying in chunks."""
+    path = blob_path(digest)
+    if os.path.exists(path):
+        return digest
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        fileobj.seek(0)
+        with os.fdopen(fd, "wb") as f:
+            shutil.copyfileobj(fileobj, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest
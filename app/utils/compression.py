@@ -0,0 +1,20 @@
+"""
+Response compression with Starlette's gzip.
+
+Streaming endpoints are skipped: the compressor buffers output, which
+would hold back SSE events, and PDFs are already compressed.
+"""
+from starlette.middleware.gzip import GZipMiddleware
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, exclude_suffixes: tuple = ()):
+        self.app = app
+        self.exclude_suffixes = exclude_suffixes
+        self.compressed = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not scope["path"].endswith(self.exclude_suffixes):
+            await self.compressed(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
@@ -1,13 +1,146 @@
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO
+
 from PyPDF2 import PdfReader
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
+from app.config import (
+    PDF_WORKERS,
+    PDF_PARALLEL_MIN_PAGES,
+    PDF_MAX_PAGES,
+    PDF_MAX_CHARS,
+)
+
+# Text extraction is pure-Python CPU work; running it in worker processes
+# keeps it off the GIL the request threads need. Created on first use.
+_pool = None
+_pool_lock = threading.Lock()
+
+_stats = {"documents": 0, "parallel": 0, "truncated": 0, "pages": 0, "chars": 0,
+          "total_ms": 0.0, "max_ms": 0.0}
+_recent = deque(maxlen=20)  # per-document timings
+_stats_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: never fork a process that is running server threads
+                _pool = ProcessPoolExecutor(
+                    max_workers=PDF_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _iter_page_texts(reader: PdfReader, start: int, stop: int, max_chars: int):
+    """Yield page texts in order until `max_chars` is reached."""
+    total = 0
+    for i in range(start, stop):
+        text = reader.pages[i].extract_text() or ""
+        yield text
+        total += len(text) + 1
+        if total >= max_chars:
+            return
+
+
+def _extract_pages(pdf_bytes: bytes, start: int, stop: int, max_chars: int) -> list:
+    """Worker entry point: texts of pages [start, stop)."""
+    reader = PdfReader(BytesIO(pdf_bytes))
+    return list(_iter_page_texts(reader, start, stop, max_chars))
+
+
+def _shards(pages: int, workers: int) -> list:
+    size = -(-pages // workers)  # ceil
+    return [(start, min(start + size, pages)) for start in range(0, pages, size)]
+
+
+def _record(pages: int, chars: int, elapsed_ms: float, parallel: bool, truncated: bool):
+    with _stats_lock:
+        _stats["documents"] += 1
+        _stats["parallel"] += parallel
+        _stats["truncated"] += truncated
+        _stats["pages"] += pages
+        _stats["chars"] += chars
+        _stats["total_ms"] += elapsed_ms
+        _stats["max_ms"] = max(_stats["max_ms"], elapsed_ms)
+        _recent.append({
+            "pages": pages,
+            "chars": chars,
+            "ms": round(elapsed_ms, 1),
+            "parallel": parallel,
+            "truncated": truncated,
+        })
+
+
+def extract_text_from_pdf(source) -> str:
+    """
+    Text of a PDF given as bytes or a seekable binary file object.
+    Reads at most PDF_MAX_PAGES pages and returns at most PDF_MAX_CHARS
+    characters. Documents with PDF_PARALLEL_MIN_PAGES or more pages are
+    split across the process pool; smaller ones use a single worker.
+    """
+    start = time.perf_counter()
     try:
-        reader = PdfReader(BytesIO(file_bytes))
-        text = ""
-        for page in reader.pages:
-            page_text = page.extract_text() or ""
-            text += page_text + "\n"
-        return text.strip()
+        if isinstance(source, (bytes, bytearray)):
+            pdf_bytes = bytes(source)
+        else:
+            source.seek(0)
+            pdf_bytes = source.read()
+
+        total_pages = len(PdfReader(BytesIO(pdf_bytes)).pages)
+        pages = min(total_pages, PDF_MAX_PAGES)
+
+        parallel = PDF_WORKERS > 1 and pages >= PDF_PARALLEL_MIN_PAGES
+        shards = _shards(pages, PDF_WORKERS) if parallel else [(0, pages)]
+
+        if PDF_WORKERS and pages:
+            try:
+                pool = _get_pool()
+                futures = [
+                    pool.submit(_extract_pages, pdf_bytes, lo, hi, PDF_MAX_CHARS)
+                    for lo, hi in shards
+                ]
+                parts = [text for f in futures for text in f.result()]
+            except BrokenProcessPool:
+                print("PDF worker pool broke; extracting in-process")
+                _reset_pool()
+                parallel = False
+                parts = _extract_pages(pdf_bytes, 0, pages, PDF_MAX_CHARS)
+        else:
+            parts = _extract_pages(pdf_bytes, 0, pages, PDF_MAX_CHARS)
+
+        text = "\n".join(parts).strip()
+        truncated = total_pages > pages or len(text) > PDF_MAX_CHARS
+        text = text[:PDF_MAX_CHARS]
     except Exception as e:
         raise ValueError(f"PDF extraction failed: {e}")
+
+    _record(pages, len(text), (time.perf_counter() - start) * 1000, parallel, truncated)
+    return text
+
+
+def get_pdf_stats() -> dict:
+    with _stats_lock:
+        docs = _stats["documents"]
+        return {
+            **_stats,
+            "total_ms": round(_stats["total_ms"], 1),
+            "max_ms": round(_stats["max_ms"], 1),
+            "avg_ms": round(_stats["total_ms"] / docs, 1) if docs else 0.0,
+            "recent": list(_recent),
+        }
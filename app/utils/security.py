@@ -1,20 +1,98 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
 from fastapi import Header, HTTPException
-from app.database import get_db
+from app.config import AUTH_CACHE_SIZE, AUTH_CACHE_TTL
+from app.database import get_db, run_db
+
+# sha256(api_key) -> (expires_at, user); raw keys are never held in memory
+_auth_cache = OrderedDict()
+_auth_lock = threading.Lock()
+_auth_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _key_digest(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+def _cache_get(digest: str):
+    now = time.monotonic()
+    with _auth_lock:
+        entry = _auth_cache.get(digest)
+        if entry and entry[0] > now:
+            _auth_cache.move_to_end(digest)
+            _auth_stats["hits"] += 1
+            return entry[1]
+        if entry:
+            del _auth_cache[digest]
+        _auth_stats["misses"] += 1
+        return None
+
+
+def _cache_put(digest: str, user: dict):
+    with _auth_lock:
+        _auth_cache[digest] = (time.monotonic() + AUTH_CACHE_TTL, user)
+        _auth_cache.move_to_end(digest)
+        while len(_auth_cache) > AUTH_CACHE_SIZE:
+            _auth_cache.popitem(last=False)
+            _auth_stats["evictions"] += 1
 
-async def verify_api_key(x_api_key: str = Header(None)):
-    if x_api_key is None:
-        raise HTTPException(status_code=401, detail="API Key missing")
 
+def invalidate_api_key(api_key: str = None, user_id: int = None):
+    """
+    Drop cached auth entries. Call whenever a key is rotated or revoked:
+    by key, by user, or with no arguments to clear everything.
+    """
+    with _auth_lock:
+        if api_key is None and user_id is None:
+            _auth_cache.clear()
+            return
+        if api_key is not None:
+            _auth_cache.pop(_key_digest(api_key), None)
+        if user_id is not None:
+            for digest in [d for d, (_, u) in _auth_cache.items() if u["user_id"] == user_id]:
+                del _auth_cache[digest]
+
+
+def get_auth_cache_stats() -> dict:
+    with _auth_lock:
+        lookups = _auth_stats["hits"] + _auth_stats["misses"]
+        return {
+            **_auth_stats,
+            "size": len(_auth_cache),
+            "max_size": AUTH_CACHE_SIZE,
+            "ttl_seconds": AUTH_CACHE_TTL,
+            "hit_rate": round(_auth_stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+def _lookup_api_key(api_key: str):
     with get_db() as db:
-        row = db.execute(
+        return db.execute(
             "SELECT id, username FROM users WHERE api_key = ?",
-            (x_api_key,)
+            (api_key,)
         ).fetchone()
 
+
+async def verify_api_key(x_api_key: str = Header(None)):
+    if x_api_key is None:
+        raise HTTPException(status_code=401, detail="API Key missing")
+
+    digest = _key_digest(x_api_key)
+    user = _cache_get(digest)
+    if user is not None:
+        return user
+
+    row = await run_db(_lookup_api_key, x_api_key)
+
     if row is None:
         raise HTTPException(status_code=403, detail="Invalid API Key")
 
-    return {"user_id": row["id"], "username": row["username"]}
+    user = {"user_id": row["id"], "username": row["username"]}
+    _cache_put(digest, user)
+    return user
 
 import bcrypt
 import os
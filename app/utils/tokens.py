@@ -0,0 +1,52 @@
+import math
+
+try:
+    import tiktoken
+except ImportError:  # optional; fall back to a character-based estimate
+    tiktoken = None
+
+# gpt-4o / gpt-4o-mini tokenizer
+_ENCODING_NAME = "o200k_base"
+_CHARS_PER_TOKEN = 4
+_encoding = None
+
+
+def _get_encoding():
+    """
+    The tiktoken encoding, or None when tiktoken is missing or its BPE
+    file cannot be loaded (first use downloads it unless cached).
+    """
+    global tiktoken, _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding(_ENCODING_NAME)
+        except Exception as e:
+            print(f"tiktoken unavailable, estimating tokens from length: {e}")
+            tiktoken = None
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """
+    Token count of `text`: exact with tiktoken, otherwise a ~4 chars/token
+    estimate (budgets are then approximate).
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` to at most `max_tokens` tokens (same counting as count_tokens)."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens])
+    return text[:max_tokens * _CHARS_PER_TOKEN]
@@ -0,0 +1,70 @@
+"""
+Bounded-memory handling of PDF uploads.
+
+UploadSizeLimitMiddleware counts request body bytes as they arrive and
+answers 413 as soon as an upload route's limit is crossed, so oversized
+bodies are never buffered. Within the limit, Starlette's multipart
+parser spools each file to a SpooledTemporaryFile (memory up to 1 MB,
+disk beyond); routes hand that spool on instead of reading it into RAM.
+"""
+from fastapi import HTTPException, UploadFile
+from starlette.responses import JSONResponse
+
+# Multipart framing (boundaries, part headers, other fields) on top of the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    def __init__(self, app, limits: dict):
+        # path -> max file bytes
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.limits:
+            await self.app(scope, receive, send)
+            return
+
+        max_body = self.limits[scope["path"]] + MULTIPART_OVERHEAD
+
+        # Honest clients announce the size up front: reject before reading
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > max_body:
+                await self._reject(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body:
+                    # Raised inside form parsing; FastAPI turns it into the response
+                    raise HTTPException(status_code=413, detail=_limit_detail(self.limits[scope["path"]]))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def _reject(self, scope, receive, send):
+        response = JSONResponse(
+            {"detail": _limit_detail(self.limits[scope["path"]])},
+            status_code=413,
+        )
+        await response(scope, receive, send)
+
+
+def _limit_detail(max_bytes: int) -> str:
+    return f"Upload exceeds {max_bytes / (1024 * 1024):g}MB limit"
+
+
+def spooled_upload(file: UploadFile, max_bytes: int):
+    """
+    The upload's spooled file object, rewound, after enforcing `max_bytes`
+    (413). Nothing is read into memory here.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail=_limit_detail(max_bytes))
+    file.file.seek(0)
+    return file.file
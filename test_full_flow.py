@@ -1,5 +1,6 @@
 import os
 import json
+import time
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -87,8 +88,13 @@ def test_full_interview_flow():
         assert next_q is not None
         question = next_q
 
-    # 6️⃣ Final report
-    report_resp = client.get(f"/report/{interview_id}", headers=headers)
+    # 6️⃣ Final report (generated in the background: 202 until ready)
+    for _ in range(60):
+        report_resp = client.get(f"/report/{interview_id}", headers=headers)
+        if report_resp.status_code != 202:
+            break
+        assert report_resp.json()["status"] in ("queued", "running")
+        time.sleep(1)
     assert report_resp.status_code == 200
 
     report = report_resp.json()
@@ -97,3 +103,9 @@ def test_full_interview_flow():
     assert "weaknesses" in report
     assert "recommendation" in report
     assert report["final_score"] >= 15  # minimum possible
+
+    # 7️⃣ Follow-ups filled the rest, so no consequential question went unused
+    config = client.get("/admin/get_question_config", headers=admin_headers).json()
+    inventory = client.get(f"/admin/question_inventory/{interview_id}", headers=admin_headers).json()
+    assert inventory["consequential"]["generated"] == config["consequential_max"]
+    assert inventory["consequential"]["wasted"] == 0